@@ -4,13 +4,15 @@
 
 import os
 import sys
+import tempfile
+import zipfile
 
 import numpy as np
 import json
 import pickle
 
 from scipy.interpolate import PchipInterpolator
-from scipy.interpolate import pchip_interpolate
+from scipy.interpolate import PPoly
 from scipy.interpolate import RegularGridInterpolator
 
 
@@ -28,20 +30,127 @@ glob_hist_data    = None
 glob_pppc_data    = None
 glob_f_data       = None
 
+# Natural log of 10, for converting between log10 and natural log.
+_ln10 = np.log(10.)
+
+def _pchip_derivs(h, m):
+    """ Derivatives at the abscissa points of a PCHIP interpolation.
+
+    Uses the Fritsch-Carlson method with the same end point conditions as ``scipy.interpolate.PchipInterpolator``. 
+
+    Parameters
+    ----------
+    h : ndarray
+        The widths of the intervals between abscissa points.
+    m : ndarray
+        The slopes of the data in each interval. 
+
+    Returns
+    -------
+    ndarray
+        The derivatives at each abscissa point. 
+    """
+
+    d = np.zeros(m.size + 1)
+
+    if m.size == 1:
+        d[:] = m[0]
+        return d
+
+    # Interior points: weighted harmonic mean of the slopes on either
+    # side, or zero if the data has a local extremum or is flat.
+    w1 = 2*h[1:] + h[:-1]
+    w2 = h[1:] + 2*h[:-1]
+    mono = (np.sign(m[1:]) == np.sign(m[:-1])) & (m[1:] != 0) & (m[:-1] != 0)
+    d[1:-1][mono] = 1. / (
+        (w1[mono]/m[:-1][mono] + w2[mono]/m[1:][mono]) 
+        / (w1[mono] + w2[mono])
+    )
+
+    # End points: one-sided three-point estimate, kept shape-preserving.
+    # Both ends are done together, with index 0 for the first point and 
+    # index 1 for the last.
+    h0 = h[[0, -1]]
+    h1 = h[[1, -2]]
+    m0 = m[[0, -1]]
+    m1 = m[[1, -2]]
+    d_end = ((2*h0 + h1)*m0 - h0*m1)/(h0 + h1)
+    wrong_sign = np.sign(d_end) != np.sign(m0)
+    overshoot  = (
+        ~wrong_sign & (np.sign(m0) != np.sign(m1)) 
+        & (np.abs(d_end) > 3*np.abs(m0))
+    )
+    d_end[wrong_sign] = 0.
+    d_end[overshoot]  = 3*m0[overshoot]
+    d[[0, -1]] = d_end
+
+    return d
+
+def _pchip_eval(x, y, x_new):
+    """ PCHIP interpolation of y(x), evaluated at x_new. 
+
+    Equivalent to ``scipy.interpolate.pchip_interpolate``, but builds the piecewise cubic directly instead of going through the validation and setup of ``PchipInterpolator``. Points outside of x are extrapolated from the first or last interval. 
+
+    Parameters
+    ----------
+    x : ndarray
+        Abscissa of the data, in increasing order.
+    y : ndarray
+        The data to interpolate.
+    x_new : ndarray
+        The points to evaluate the interpolation at.
+
+    Returns
+    -------
+    ndarray
+        The interpolated values at x_new. 
+    """
+
+    h = np.diff(x)
+    m = np.diff(y)/h
+    d = _pchip_derivs(h, m)
+
+    # Coefficients of the cubic in each interval, in powers of 
+    # (x_new - x[i]). 
+    c = np.array([
+        (d[:-1] + d[1:] - 2*m)/h**2, 
+        (3*m - 2*d[:-1] - d[1:])/h, 
+        d[:-1], 
+        y[:-1]
+    ])
+
+    return PPoly.construct_fast(c, x)(x_new)
+
+def _in_range(lo, hi, x, assume_sorted):
+    """ Returns the part of x with lo < x < hi. 
+
+    This is a slice if x is sorted, and a boolean mask otherwise.
+    """
+
+    if assume_sorted:
+        return slice(
+            np.searchsorted(x, lo, side='right'), 
+            np.searchsorted(x, hi, side='left')
+        )
+    else:
+        return (x > lo) & (x < hi)
+
 class PchipInterpolator2D: 
 
     """ 2D interpolation over PPPC4DMID raw data, using the PCHIP method.
 
     Parameters
     -----------
-    coords_data : ndarray, size (M,N)
-
-        
-    values_data : ndarray
+    coords_data : ndarray, size (2, 23, 2)
+        Object array of the PPPC4DMID abscissae, indexed by secondary, primary channel and {mDM in GeV, log10(K/mDM)}. Each element is a 1D array.
+    values_data : ndarray, size (2, 23)
+        Object array of the PPPC4DMID d log10 N / d log10 x tables, indexed by secondary and primary channel. Each element is a 2D array indexed by (mDM, log10x).
     pri : string
         Specifies primary annihilation channel. See :func:`.get_pppc_spec` for the full list.
     sec : {'elec', 'phot'}
         Specifies which secondary spectrum to obtain (electrons/positrons or photons).
+    mDM_coeffs_cache : dict, optional
+        Cache of the PCHIP coefficients over mDM for each table in values_data. Passing the same dictionary to all interpolators built from the same data means that each table is only fitted once. 
 
     Attributes
     ----------
@@ -49,8 +158,10 @@ class PchipInterpolator2D:
         Specifies primary annihilation channel. See :func:`.get_pppc_spec` for the full list.
     sec : {'elec', 'phot'}
         Specifies which secondary spectrum to obtain (electrons/positrons or photons).
+    log10x_range : tuple of float
+        The (lowest, highest) log10(K/mDM) in the tables. The interpolated spectrum vanishes outside of this range. 
     get_val : function
-        Returns the interpolation value at (coord, value) based 
+        Returns the interpolation value at (coord, value) based. If log10x is sorted, ``assume_sorted=True`` locates the interpolation range by bisection. 
 
     Notes
     -------
@@ -58,7 +169,9 @@ class PchipInterpolator2D:
 
     """
     
-    def __init__(self, coords_data, values_data, pri, sec):
+    def __init__(
+        self, coords_data, values_data, pri, sec, mDM_coeffs_cache=None
+    ):
         if sec == 'elec':
             i = 0
             # fac is used to multiply the raw electron data by 2 to get the
@@ -92,6 +205,13 @@ class PchipInterpolator2D:
             pri_2 = pri
             self._weight = [0.5, 0.5]
 
+        # If both halves are the same table, get_val only evaluates one.
+        self._symmetric = pri_1 == pri_2
+
+        # Natural log of the weights, for combining the two halves in 
+        # log space.
+        self._log_weight = np.log(self._weight)
+
         idx_list_data = {
             'e_L': 0, 'e_R': 1, 'mu_L': 2, 'mu_R': 3, 'tau_L': 4, 'tau_R': 5,
             'q': 6, 'c': 7, 'b': 8, 't': 9,
@@ -101,69 +221,277 @@ class PchipInterpolator2D:
             'VV_to_4e': 20, 'VV_to_4mu': 21, 'VV_to_4tau': 22
         } 
         
-        # Compile the raw data.
-        mDM_in_GeV_arr_1 = np.array(
-            coords_data[i, idx_list_data[pri_1], 0]
+        # Compile the raw data. The tables from load_data() are already
+        # float64 arrays, and are shared between all instances rather
+        # than copied into each one.
+        mDM_in_GeV_arr_1 = np.asarray(
+            coords_data[i, idx_list_data[pri_1], 0], dtype=float
+        )
+        log10x_arr_1     = np.asarray(
+            coords_data[i, idx_list_data[pri_1], 1], dtype=float
         )
-        log10x_arr_1     = np.array(
-            coords_data[i, idx_list_data[pri_1], 1]
+        values_arr_1     = np.asarray(
+            values_data[i, idx_list_data[pri_1]], dtype=float
         )
-        values_arr_1     = np.array(values_data[i, idx_list_data[pri_1]])
 
-        mDM_in_GeV_arr_2 = np.array(
-            coords_data[i, idx_list_data[pri_2], 0]
+        mDM_in_GeV_arr_2 = np.asarray(
+            coords_data[i, idx_list_data[pri_2], 0], dtype=float
         )
-        log10x_arr_2     = np.array(
-            coords_data[i, idx_list_data[pri_2], 1]
+        log10x_arr_2     = np.asarray(
+            coords_data[i, idx_list_data[pri_2], 1], dtype=float
+        )
+        values_arr_2     = np.asarray(
+            values_data[i, idx_list_data[pri_2]], dtype=float
         )
-        values_arr_2     = np.array(values_data[i, idx_list_data[pri_2]])
 
         self._mDM_in_GeV_arrs = [mDM_in_GeV_arr_1, mDM_in_GeV_arr_2] 
         self._log10x_arrs     = [log10x_arr_1,     log10x_arr_2]
 
-        # Save the 1D PCHIP interpolator over mDM_in_GeV. Multiply the 
-        # electron spectrum by 2 by adding np.log10(2).  
-        self._interpolators = [
-            PchipInterpolator(
-                mDM_in_GeV_arr_1, values_arr_1 + np.log10(fac), 
-                extrapolate=False
-            ),
-            PchipInterpolator(
-                mDM_in_GeV_arr_2, values_arr_2 + np.log10(fac),
-                extrapolate=False
-            )
+        # mDM range covered by both halves. 
+        self._mDM_lo = max(mDM_in_GeV_arr_1[0],  mDM_in_GeV_arr_2[0])
+        self._mDM_hi = min(mDM_in_GeV_arr_1[-1], mDM_in_GeV_arr_2[-1])
+
+        self._log10x_bounds = [
+            (log10x_arr_1[0], log10x_arr_1[-1]), 
+            (log10x_arr_2[0], log10x_arr_2[-1])
         ]
+
+        self.log10x_range = (
+            min(log10x_arr_1[0],  log10x_arr_2[0]), 
+            max(log10x_arr_1[-1], log10x_arr_2[-1])
+        )
+
+        # Save the piecewise cubic coefficients of the 1D PCHIP 
+        # interpolation over mDM_in_GeV, with shape (4, mDM.size-1, 
+        # log10x.size), so that each call only has to evaluate one 
+        # cubic. The coefficients only depend on the table used, and are 
+        # shared through mDM_coeffs_cache, e.g. between 'e_L' and 'e'. 
+        if mDM_coeffs_cache is None:
+            mDM_coeffs_cache = {}
+
+        self._mDM_coeffs = []
+        for pri_half, mDM_in_GeV_arr, values_arr in (
+            (pri_1, mDM_in_GeV_arr_1, values_arr_1), 
+            (pri_2, mDM_in_GeV_arr_2, values_arr_2)
+        ):
+            key = (sec, pri_half)
+            if key not in mDM_coeffs_cache:
+                mDM_coeffs_cache[key] = PchipInterpolator(
+                    mDM_in_GeV_arr, values_arr, extrapolate=False
+                ).c
+            self._mDM_coeffs.append(mDM_coeffs_cache[key])
+
+        # Multiply the electron spectrum by 2 by adding np.log10(2). 
+        # PCHIP interpolation commutes with adding a constant, so this
+        # is applied to the table at each mDM in get_val, instead of 
+        # to a copy of the full table.
+        self._log_fac = np.log10(fac)
+
+    def _interp_mDM(self, k, mDM_in_GeV):
+        """ Evaluates half k of the PCHIP interpolation over mDM. 
+
+        Returns the log10x table at mDM_in_GeV, which must lie within the interpolation range.
+        """
+
+        mDM_arr = self._mDM_in_GeV_arrs[k]
+        c       = self._mDM_coeffs[k]
+
+        # Interval containing mDM_in_GeV, with the last abscissa point 
+        # belonging to the last interval.
+        j  = min(
+            np.searchsorted(mDM_arr, mDM_in_GeV, side='right') - 1, 
+            mDM_arr.size - 2
+        )
+        dx = mDM_in_GeV - mDM_arr[j]
+
+        # Horner's method.
+        return ((c[0, j]*dx + c[1, j])*dx + c[2, j])*dx + c[3, j]
     
-    def get_val(self, mDM_in_GeV, log10x):
+    def get_val(self, mDM_in_GeV, log10x, assume_sorted=False):
         
-        if (
-            mDM_in_GeV < self._mDM_in_GeV_arrs[0][0] 
-            or mDM_in_GeV < self._mDM_in_GeV_arrs[1][0]
-            or mDM_in_GeV > self._mDM_in_GeV_arrs[0][-1]
-            or mDM_in_GeV > self._mDM_in_GeV_arrs[1][-1]
-        ):
+        if not self._mDM_lo <= mDM_in_GeV <= self._mDM_hi:
             raise TypeError('mDM lies outside of the interpolation range.')
         
-        # Call the saved interpolator at mDM_in_GeV, 
-        # then use PCHIP 1D interpolation at log10x. 
-        result1 = pchip_interpolate(
-            self._log10x_arrs[0], self._interpolators[0](mDM_in_GeV), log10x
+        # Evaluate the saved interpolation at mDM_in_GeV, 
+        # then use PCHIP 1D interpolation at log10x. All values 
+        # outside of the log10x interpolation range are (effectively) zero,
+        # so only the values inside the range are evaluated. If log10x is
+        # sorted, this range is found by bisection. 
+        # Bind the attributes used below to locals once.
+        (lo1, hi1), (lo2, hi2) = self._log10x_bounds
+        log10x_arr_1, log10x_arr_2 = self._log10x_arrs
+        log_fac = self._log_fac
+        shape = np.shape(log10x)
+
+        table1 = self._interp_mDM(0, mDM_in_GeV)
+        if log_fac:
+            table1 += log_fac
+        in_range_1 = _in_range(lo1, hi1, log10x, assume_sorted)
+        result1 = np.full(shape, -100.)
+        result1[in_range_1] = _pchip_eval(
+            log10x_arr_1, table1, log10x[in_range_1]
         )
-        # Set all values outside of the log10x interpolation range to 
-        # (effectively) zero. 
-        result1[log10x >= self._log10x_arrs[0][-1]] = -100.
-        result1[log10x <= self._log10x_arrs[0][0]]  = -100.
-        
-        result2 = pchip_interpolate(
-            self._log10x_arrs[1], self._interpolators[1](mDM_in_GeV), log10x
+
+        if self._symmetric:
+            # Both halves are the same table, and the weights sum to one. 
+            return result1
+
+        table2 = self._interp_mDM(1, mDM_in_GeV)
+        if log_fac:
+            table2 += log_fac
+        # The two halves usually share the same range, in which case the 
+        # range is only computed once. 
+        if lo1 == lo2 and hi1 == hi2:
+            in_range_2 = in_range_1
+        else:
+            in_range_2 = _in_range(lo2, hi2, log10x, assume_sorted)
+        result2 = np.full(shape, -100.)
+        result2[in_range_2] = _pchip_eval(
+            log10x_arr_2, table2, log10x[in_range_2]
         )
-        result2[log10x >= self._log10x_arrs[1][-1]] = -100.
-        result2[log10x <= self._log10x_arrs[1][0]]  = -100.
         
-        # Combine the two spectra.  
-        return np.log10(
-            self._weight[0]*10**result1 + self._weight[1]*10**result2
-        )
+        # Combine the two spectra, i.e. compute
+        # log10(weight[0]*10**result1 + weight[1]*10**result2). 
+        # np.logaddexp does this in one pass without overflow, and 
+        # without forming 10**result1 and 10**result2. 
+        log_weight_1, log_weight_2 = self._log_weight
+        return np.logaddexp(
+            result1*_ln10 + log_weight_1, result2*_ln10 + log_weight_2
+        )/_ln10
+
+def _pppc_tables_from_json(coords_file_name, values_file_name):
+    """ Reads the PPPC4DMID tables from the original JSON files. 
+
+    Parameters
+    ----------
+    coords_file_name : str
+        File containing the abscissae of the tables.
+    values_file_name : str
+        File containing the values of the tables.
+
+    Returns
+    -------
+    tuple of ndarray
+        coords_data and values_data, see :class:`PchipInterpolator2D`. 
+    """
+
+    with open(coords_file_name) as data_file:    
+        coords_list = json.load(data_file)
+    with open(values_file_name) as data_file:
+        values_list = json.load(data_file)
+
+    # The tables are ragged, so np.array() on the nested lists
+    # would give an object array of lists that has to be
+    # converted again downstream (and is an error in newer
+    # versions of numpy). Convert each table to float64 once.
+    coords_data = np.empty((2, 23, 2), dtype=object)
+    values_data = np.empty((2, 23), dtype=object)
+    for i in np.arange(2):
+        for j in np.arange(23):
+            values_data[i, j] = np.array(values_list[i][j], dtype=float)
+            for k in np.arange(2):
+                coords_data[i, j, k] = np.array(
+                    coords_list[i][j][k], dtype=float
+                )
+
+    return coords_data, values_data
+
+def _pppc_source_stamp(file_names):
+    """ Returns the modification time and size of the PPPC4DMID JSON tables.
+
+    Parameters
+    ----------
+    file_names : list of str
+        The JSON tables.
+
+    Returns
+    -------
+    ndarray
+        The modification time in ns and the size in bytes of each file. 
+    """
+
+    return np.array(
+        [[os.stat(f).st_mtime_ns, os.stat(f).st_size] for f in file_names],
+        dtype=np.int64
+    )
+
+def _pppc_tables_to_npz(
+    npz_file_name, coords_data, values_data, source_stamp
+):
+    """ Saves the PPPC4DMID tables as a .npz file of float64 arrays.
+
+    The file is first written to a temporary file in the same directory, and then moved into place, so that an interrupted run does not leave a truncated file behind. 
+
+    Parameters
+    ----------
+    npz_file_name : str
+        File to write to.
+    coords_data : ndarray
+        See :class:`PchipInterpolator2D`. 
+    values_data : ndarray
+        See :class:`PchipInterpolator2D`. 
+    source_stamp : ndarray
+        The output of :func:`_pppc_source_stamp` for the JSON tables that the data was read from. 
+
+    Returns
+    -------
+    None
+    """
+
+    tables = {'source_stamp': source_stamp}
+    for i in np.arange(2):
+        for j in np.arange(23):
+            tables['values_%d_%d' % (i, j)] = values_data[i, j]
+            for k in np.arange(2):
+                tables['coords_%d_%d_%d' % (i, j, k)] = coords_data[i, j, k]
+
+    fd, tmp_file_name = tempfile.mkstemp(
+        suffix='.npz', dir=os.path.dirname(os.path.abspath(npz_file_name))
+    )
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.savez(tmp_file, **tables)
+        os.replace(tmp_file_name, npz_file_name)
+    except BaseException:
+        os.remove(tmp_file_name)
+        raise
+
+def _pppc_tables_from_npz(npz_file_name, source_stamp):
+    """ Reads the PPPC4DMID tables saved by :func:`_pppc_tables_to_npz`. 
+
+    Parameters
+    ----------
+    npz_file_name : str
+        File to read from.
+    source_stamp : ndarray
+        The output of :func:`_pppc_source_stamp` for the current JSON tables. 
+
+    Returns
+    -------
+    tuple of ndarray
+        coords_data and values_data, see :class:`PchipInterpolator2D`. 
+
+    Raises
+    ------
+    ValueError
+        If the file was made from a different version of the JSON tables. 
+    """
+
+    coords_data = np.empty((2, 23, 2), dtype=object)
+    values_data = np.empty((2, 23), dtype=object)
+
+    with np.load(npz_file_name) as tables:
+        if not np.array_equal(tables['source_stamp'], source_stamp):
+            raise ValueError('the .npz file is out of date.')
+        for i in np.arange(2):
+            for j in np.arange(23):
+                values_data[i, j] = tables['values_%d_%d' % (i, j)]
+                for k in np.arange(2):
+                    coords_data[i, j, k] = tables[
+                        'coords_%d_%d_%d' % (i, j, k)
+                    ]
+
+    return coords_data, values_data
 
 def load_data(data_type):
     """ Loads data from downloaded files. 
@@ -384,11 +712,33 @@ def load_data(data_type):
             values_file_name = (
                 data_path+'/dlNdlxIEW_values_table.txt'
             )
+            npz_file_name = (
+                data_path+'/dlNdlxIEW_table.npz'
+            )
 
-            with open(coords_file_name) as data_file:    
-                coords_data = np.array(json.load(data_file))
-            with open(values_file_name) as data_file:
-                values_data = np.array(json.load(data_file))
+            # Parsing the JSON tables is slow, so they are converted to
+            # a binary .npz file the first time they are read. The .npz
+            # file is rebuilt if the JSON tables have changed since, or
+            # if it cannot be read.
+            source_stamp = _pppc_source_stamp(
+                [coords_file_name, values_file_name]
+            )
+            try:
+                coords_data, values_data = _pppc_tables_from_npz(
+                    npz_file_name, source_stamp
+                )
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                coords_data, values_data = _pppc_tables_from_json(
+                    coords_file_name, values_file_name
+                )
+                try:
+                    _pppc_tables_to_npz(
+                        npz_file_name, coords_data, values_data,
+                        source_stamp
+                    )
+                except OSError:
+                    # Read-only data directory: use the JSON tables.
+                    pass
 
             # coords_data is a (2, 23, 2) array. 
             # axis 0: stable SM secondaries, {'elec', 'phot'}
@@ -415,12 +765,15 @@ def load_data(data_type):
                 'VV_to_4e', 'VV_to_4mu', 'VV_to_4tau'
             ]
 
+            # Each table is fitted once, and shared between channels.
+            mDM_coeffs_cache = {}
+
             for pri in chan_list:
                 dlNdlxIEW_interp['elec'][pri] = PchipInterpolator2D(
-                    coords_data, values_data, pri, 'elec'
+                    coords_data, values_data, pri, 'elec', mDM_coeffs_cache
                 )
                 dlNdlxIEW_interp['phot'][pri] = PchipInterpolator2D(
-                    coords_data, values_data, pri, 'phot'
+                    coords_data, values_data, pri, 'phot', mDM_coeffs_cache
                 )
 
             glob_pppc_data = dlNdlxIEW_interp
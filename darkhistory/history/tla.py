@@ -305,19 +305,21 @@ def get_history(
             ne = xe * nH
             xHI = 1 - xHII(yHII)
             xHeI = chi - xHeII(yHeII) - xHeIII(yHeIII)
+            peebles_C = phys.peebles_C(xHII(yHII), rs)
+            T_CMB = phys.TCMB(rs)
 
             return 2 * np.cosh(yHII)**2 * phys.dtdz(rs) * (
                 # Recombination processes. 
                 # Boltzmann factor is T_r, agrees with HyREC paper.
-                - phys.peebles_C(xHII(yHII), rs) * (
+                - peebles_C * (
                     phys.alpha_recomb(T_m, 'HI') * xHII(yHII) * xe * nH
-                    - 4*phys.beta_ion(phys.TCMB(rs), 'HI') * xHI
-                        * np.exp(-phys.lya_eng/phys.TCMB(rs))
+                    - 4*phys.beta_ion(T_CMB, 'HI') * xHI
+                        * np.exp(-phys.lya_eng/T_CMB)
                 )
                 # DM injection. Note that C = 1 at late times.
                 + _f_H_ion(rs, xHI, xHeI, xHeII(yHeII)) * inj_rate
                     / (phys.rydberg * nH)
-                + (1 - phys.peebles_C(xHII(yHII), rs)) * (
+                + (1 - peebles_C) * (
                     _f_H_exc(rs, xHI, xHeI, xHeII(yHeII)) * inj_rate
                     / (phys.lya_eng * nH)
                 )
@@ -501,6 +501,11 @@ def alpha_recomb(T_m, species):
 
     
 
+# The electron thermal de Broglie wavelength is 
+# c 2 pi hbar / sqrt(2 pi me T), so that its inverse cube is 
+# _inv_de_broglie_cubed_fac * T**(3/2).
+_inv_de_broglie_cubed_fac = (2*np.pi*me)**1.5 / (c*2*np.pi*hbar)**3
+
 def beta_ion(T_rad, species):
     """Case-B photoionization coefficient.
 
@@ -522,30 +527,26 @@ def beta_ion(T_rad, species):
     in agreement with convention in RECFAST.
 
     """
-    de_broglie_wavelength = (
-        c * 2*np.pi*hbar
-        / np.sqrt(2 * np.pi * me * T_rad)
-    )
+    # (1/de_broglie_wavelength)**3, with the constant part precomputed.
+    inv_de_broglie_cubed = _inv_de_broglie_cubed_fac * T_rad*np.sqrt(T_rad)
     
     if species == 'HI':
         return (
-            (1/de_broglie_wavelength)**3
+            inv_de_broglie_cubed
             * np.exp(-rydberg/4/T_rad) * alpha_recomb(T_rad, 'HI')
         )/4
 
     elif species == 'HeI_21s':
         E_21s_inf = He_ion_eng - He_exc_eng['21s']
-        # print(E_21s_inf)
-        # print(de_broglie_wavelength)
         return 4*(
-            (1/de_broglie_wavelength)**3
+            inv_de_broglie_cubed
             * np.exp(-E_21s_inf/T_rad) * alpha_recomb(T_rad, 'HeI_21s')
         )
 
     elif species == 'HeI_23s':
         E_23s_inf = He_ion_eng - He_exc_eng['23s']
         return (4/3)*(
-            (1/de_broglie_wavelength)**3
+            inv_de_broglie_cubed
             * np.exp(-E_23s_inf/T_rad) * alpha_recomb(T_rad, 'HeI_23s')
         )
 
@@ -553,6 +554,10 @@ def beta_ion(T_rad, species):
 
         return TypeError('invalid species.')
 
+# Redshift-independent part of the 2p to 1s rate in peebles_C,
+# 8 pi / (3 nH (c/lya_freq)^3).
+_rate_2p1s_fac = 8 * np.pi / (3 * nH * (c/lya_freq)**3)
+
 def peebles_C(xHII, rs):
     """Hydrogen Peebles C coefficient.
 
@@ -573,21 +578,23 @@ def peebles_C(xHII, rs):
     # Rate 2s to 1s transition.
     rate_2s1s = width_2s1s_H
 
+    log_rs = np.log(rs)
+
+    # Gaussian corrections. 
+    gauss_corr_1 = -0.14*np.exp(-((log_rs - 7.28)/0.18)**2)
+    gauss_corr_2 = 0.079*np.exp(-((log_rs - 6.73)/0.33)**2)
+
     # Rate of 2p to 1s transition, times (1 - xHII). 
     rate_2p1s_times_x1s = (
-        8 * np.pi * hubble(rs)/
-        (3*(nH * rs**3 * (c/lya_freq)**3))
+        _rate_2p1s_fac * hubble(rs) / rs**3
+        / (1 + gauss_corr_1 + gauss_corr_2)
     )
 
-    # Gaussian corrections. 
-    gauss_corr_1 = -0.14*np.exp(-((np.log(rs) - 7.28)/0.18)**2)
-    gauss_corr_2 = 0.079*np.exp(-((np.log(rs) - 6.73)/0.33)**2)
-
-    rate_2p1s_times_x1s /= (1 + gauss_corr_1 + gauss_corr_2)
+    x1s = 1 - xHII
 
-    rate_exc = 3 * rate_2p1s_times_x1s/4 + (1-xHII) * rate_2s1s/4
+    rate_exc = 0.75 * rate_2p1s_times_x1s + 0.25 * x1s * rate_2s1s
 
-    rate_ion = (1-xHII) * beta_ion(TCMB(rs), 'HI')
+    rate_ion = x1s * beta_ion(TCMB(rs), 'HI')
 
     return rate_exc/(rate_exc + rate_ion)
 
@@ -926,18 +933,17 @@ def photo_ion_xsec(eng, species):
     
     xsec = np.zeros(eng.size)
 
+    # Only the energies above threshold are needed: gather them once.
+    eng_above = eng[ind_above]
+
     if species == 'HI' or species =='HeII':
-        eta = np.zeros(eng.size)
-        eta[ind_above] = 1./np.sqrt(eng[ind_above]/eng_thres[species] - 1.)
+        eta = 1./np.sqrt(eng_above/eng_thres[species] - 1.)
         xsec[ind_above] = (2.**9*np.pi**2*ele_rad**2/(3.*alpha**3)
-            * (eng_thres[species]/eng[ind_above])**4
-            * np.exp(-4*eta[ind_above]*np.arctan(1./eta[ind_above]))
-            / (1.-np.exp(-2*np.pi*eta[ind_above]))
+            * (eng_thres[species]/eng_above)**4
+            * np.exp(-4*eta*np.arctan(1./eta))
+            / (1.-np.exp(-2*np.pi*eta))
             )
     elif species == 'HeI':
-        x = np.zeros(eng.size)
-        y = np.zeros(eng.size)
-
         sigma0 = 9.492e2*1e-18      # in cm^2
         E0     = 13.61              # in eV
         ya     = 1.469
@@ -946,11 +952,11 @@ def photo_ion_xsec(eng, species):
         y0     = 4.434e-1
         y1     = 2.136
 
-        x[ind_above]    = (eng[ind_above]/E0) - y0
-        y[ind_above]    = np.sqrt(x[ind_above]**2 + y1**2)
-        xsec[ind_above] = (sigma0*((x[ind_above] - 1)**2 + yw**2)
-            *y[ind_above]**(0.5*P - 5.5)
-            *(1 + np.sqrt(y[ind_above]/ya))**(-P)
+        x = (eng_above/E0) - y0
+        y = np.sqrt(x**2 + y1**2)
+        xsec[ind_above] = (sigma0*((x - 1)**2 + yw**2)
+            *y**(0.5*P - 5.5)
+            *(1 + np.sqrt(y/ya))**(-P)
             )
 
     return xsec
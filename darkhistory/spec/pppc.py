@@ -6,12 +6,15 @@ import sys
 import numpy as np
 import json
 
+from functools import lru_cache
+
 # from config import data_path
 from config import load_data
 
 import darkhistory.physics as phys
 from darkhistory.spec.spectrum import Spectrum
 from darkhistory.spec.spectools import rebin_N_arr
+from darkhistory.spec.spectools import get_log_bin_width
 
 
 # Mass threshold for mDM to annihilate into the primaries.
@@ -33,6 +36,60 @@ mass_threshold = {
     'VV_to_4tau' : 2*phys.mass['tau']
 }
 
+def _fine_grid(eng, n_double):
+    """ Returns the abscissa eng with its binning doubled n_double times.
+
+    Parameters
+    ----------
+    eng : ndarray
+        The abscissa to refine.
+    n_double : int
+        The number of times to double the binning.
+
+    Returns
+    -------
+    tuple of ndarray
+        log10 of the refined abscissa, the refined abscissa and its log bin width.
+
+    Notes
+    -----
+    The refined abscissa does not depend on mDM, and is cached so that scans over mDM with the same eng only build it once. Only the most recently used abscissae are kept, since each can take tens of MB; the cache can be emptied with ``_fine_grid_cached.cache_clear()``. The returned arrays should not be modified.
+    """
+
+    return _fine_grid_cached(eng.tobytes(), eng.dtype.str, n_double)
+
+@lru_cache(maxsize=4)
+def _fine_grid_cached(eng_bytes, eng_dtype, n_double):
+    # Cached implementation of _fine_grid, keyed by the bytes and dtype
+    # of eng, since arrays cannot be hashed.
+    eng = np.frombuffer(eng_bytes, dtype=eng_dtype)
+
+    # Doubling the binning n_double times is a single linear 
+    # interpolation onto index positions spaced by 2**-n_double.
+    log10_fine_eng = np.interp(
+        np.linspace(0, eng.size-1, (eng.size-1)*2**n_double + 1), 
+        np.arange(eng.size), np.log10(eng)
+    )
+    # Exponentiate with np.exp, which is much faster than 10** on 
+    # large arrays. The highest bin is set to eng[-1] exactly, so that
+    # rebinning back to eng does not pick up a floating point error.
+    fine_eng = np.exp(np.log(10)*log10_fine_eng)
+    fine_eng[-1] = eng[-1]
+
+    return log10_fine_eng, fine_eng, get_log_bin_width(fine_eng)
+
+def _n_in_range(log10x):
+    """ Returns the number of entries of the sorted log10x with 1e-9 < log10x < 1.
+
+    Since log10x is sorted, this is found by bisection instead of building boolean masks over all of log10x.
+    """
+
+    return max(
+        np.searchsorted(log10x, 1, side='left') 
+        - np.searchsorted(log10x, 1e-9, side='right'), 
+        0
+    )
+
 def get_pppc_spec(mDM, eng, pri, sec, decay=False):
 
     """ Returns the PPPC4DMID spectrum. 
@@ -54,7 +111,7 @@ def get_pppc_spec(mDM, eng, pri, sec, decay=False):
     mDM : float
         The mass of the annihilating/decaying dark matter particle (in eV). 
     eng : ndarray
-        The energy abscissa for the output spectrum (in eV). 
+        The energy abscissa for the output spectrum (in eV), in increasing order. 
     pri : string
         One of the available channels (see above). 
     sec : {'elec', 'phot'}
@@ -69,6 +126,9 @@ def get_pppc_spec(mDM, eng, pri, sec, decay=False):
     
     """
 
+    if not np.all(np.diff(eng) > 0):
+        raise ValueError('eng must be ordered in increasing energy.')
+
     if decay:
         # Primary energies is for 1 GeV decay = 0.5 GeV annihilation.
         _mDM = mDM/2.
@@ -133,39 +193,173 @@ def get_pppc_spec(mDM, eng, pri, sec, decay=False):
     
     log10x = np.log10(eng/_mDM)
 
+    # Get the interpolator. 
+    interp = load_data('pppc')[sec][pri]
+
+    # The PPPC4DMID spectra vanish outside of the tabulated log10x range,
+    # so there is nothing to interpolate if eng lies entirely outside it.
+    log10x_lo, log10x_hi = interp.log10x_range
+    if log10x[-1] <= log10x_lo or log10x[0] >= log10x_hi:
+        return Spectrum(eng, np.zeros_like(eng), spec_type='dNdE')
+
+    return _spec_from_interp(
+        interp, _mDM, eng, *_refine_log10x(eng, _mDM, log10x)
+    )
+
+def get_pppc_spec_batch(mDM, eng, pri_list, sec, decay=False):
+
+    """ Returns the PPPC4DMID spectra for several primary channels. 
+
+    The refinement of the abscissa only depends on mDM and eng, and is done once for all of the channels. 
+
+    Parameters
+    ----------
+    mDM : float
+        The mass of the annihilating/decaying dark matter particle (in eV). 
+    eng : ndarray
+        The energy abscissa for the output spectra (in eV), in increasing order. 
+    pri_list : list of string
+        The channels to obtain. See :func:`get_pppc_spec` for the full list. 
+    sec : {'elec', 'phot'}
+        The secondary spectrum to obtain. 
+    decay : bool, optional
+        If ``True``, returns the result for decays.
+
+    Returns
+    -------
+    list of Spectrum
+        Output :class:`.Spectrum` objects, ``spec_type == 'dNdE'``, in the same order as pri_list. 
+
+    See Also
+    --------
+    :func:`get_pppc_spec`
+    
+    """
+
+    if not np.all(np.diff(eng) > 0):
+        raise ValueError('eng must be ordered in increasing energy.')
+
+    if decay:
+        _mDM = mDM/2.
+    else:
+        _mDM = mDM
+
+    log10x = np.log10(eng/_mDM)
+    dlNdlxIEW_interp = load_data('pppc')
+
+    refined = None
+    spec_list = []
+    for pri in pri_list:
+
+        if pri == 'elec_delta' or pri == 'phot_delta':
+            spec_list.append(get_pppc_spec(mDM, eng, pri, sec, decay=decay))
+            continue
+
+        if _mDM < mass_threshold[pri]:
+            raise ValueError(
+                'mDM is below the threshold to produce pri particles.'
+            )
+
+        interp = dlNdlxIEW_interp[sec][pri]
+
+        log10x_lo, log10x_hi = interp.log10x_range
+        if log10x[-1] <= log10x_lo or log10x[0] >= log10x_hi:
+            spec_list.append(
+                Spectrum(eng, np.zeros_like(eng), spec_type='dNdE')
+            )
+            continue
+
+        if refined is None:
+            refined = _refine_log10x(eng, _mDM, log10x)
+
+        spec_list.append(_spec_from_interp(interp, _mDM, eng, *refined))
+
+    return spec_list
+
+def _refine_log10x(eng, _mDM, log10x):
+    """ Returns log10x = log10(eng/_mDM) on a refined abscissa. 
+
+    Parameters
+    ----------
+    eng : ndarray
+        The energy abscissa for the output spectrum (in eV). 
+    _mDM : float
+        The dark matter mass (in eV), for annihilations. 
+    log10x : ndarray
+        log10(eng/_mDM).
+
+    Returns
+    -------
+    tuple of ndarray
+        log10x, the energy abscissa and its log bin width, all on the refined abscissa.
+    """
+
     # Refine the binning so that the spectrum is accurate. 
     # Do this by checking that in the relevant range, there are at
     # least 50,000 bins. If not, double (unless an absurd number
     # of bins already). 
 
-    if (
-        log10x[(log10x < 1) & (log10x > 1e-9)].size > 0
-        and log10x.size < 500000
-    ):
-        while log10x[(log10x < 1) & (log10x > 1e-9)].size < 50000:
-            log10x = np.interp(
-                np.arange(0, log10x.size-0.5, 0.5), 
-                np.arange(log10x.size), 
-                log10x
+    # Since log10x = log10(eng) - log10(mDM), the refined abscissae only
+    # depend on eng, and are cached so that scans over mDM reuse them. 
+    # n_double is estimated up front, so this usually takes one step.
+
+    n_in_range = _n_in_range(log10x)
+
+    if n_in_range > 0 and log10x.size < 500000 and n_in_range < 50000:
+        log10_mDM = np.log10(_mDM)
+        n_double = int(np.ceil(np.log2(50000/n_in_range)))
+        while n_in_range < 50000:
+            log10_fine_eng, fine_eng, fine_log_bin_width = _fine_grid(
+                eng, n_double
             )
-    # Get the interpolator. 
-    dlNdlxIEW_interp = load_data('pppc')
+            log10x = log10_fine_eng - log10_mDM
+            n_in_range = _n_in_range(log10x)
+            n_double += 1
+
+        return log10x, fine_eng, fine_log_bin_width
+
+    return log10x, eng, get_log_bin_width(eng)
+
+def _spec_from_interp(
+    interp, _mDM, eng, log10x, fine_eng, fine_log_bin_width
+):
+    """ Returns the spectrum from a PPPC4DMID interpolator, rebinned to eng.
+
+    Parameters
+    ----------
+    interp : PchipInterpolator2D
+        The interpolator for the primary and secondary channel. 
+    _mDM : float
+        The dark matter mass (in eV), for annihilations. 
+    eng : ndarray
+        The energy abscissa for the output spectrum (in eV). 
+    log10x, fine_eng, fine_log_bin_width : ndarray
+        The output of :func:`_refine_log10x`. 
+
+    Returns
+    -------
+    Spectrum
+        Output :class:`.Spectrum` object, ``spec_type == 'dNdE'``.
+    """
 
     # Get the spectrum from the interpolator.
-    dN_dlog10x = 10**dlNdlxIEW_interp[sec][pri].get_val(_mDM/1e9, log10x)
+    # log10x is sorted, since eng is. 
+    log10_dN_dlog10x = interp.get_val(_mDM/1e9, log10x, assume_sorted=True)
 
-    # Recall that dN/dE = dN/dlog10x * dlog10x/dE
-    x = 10**log10x
-    spec = Spectrum(x*_mDM, dN_dlog10x/(x*_mDM*np.log(10)), spec_type='dNdE')
+    # Build the spectrum on the refined abscissa directly as the number of 
+    # particles per bin, N = dN/dlog10x * dlog10x = dN/dlog10x * dlogE/ln(10).
+    # Rebinning an 'N' spectrum does not need to go through dN/dE, totN and 
+    # toteng on the refined abscissa. 
+    ln10 = np.log(10)
+    spec = Spectrum(
+        fine_eng, 
+        np.exp(ln10*log10_dN_dlog10x)*fine_log_bin_width/ln10, 
+        spec_type='N'
+    )
     
     # Rebin down to the original binning.
-
-    # The highest bin of spec.eng should be the same as eng[-1], based on
-    # the interpolation strategy above. However, sometimes a floating point
-    # error is picked up. We'll get rid of this so that rebin doesn't
-    # complain.
-    spec.eng[-1] = eng[-1]
     spec.rebin(eng)
+    spec.switch_spec_type('dNdE')
         
     return spec
 
@@ -9,6 +9,7 @@ import matplotlib.pyplot as plt
 import warnings
 
 from scipy import integrate
+from scipy import sparse
 from scipy.interpolate import interp1d
 from scipy.interpolate import InterpolatedUnivariateSpline
 
@@ -112,6 +113,35 @@ def get_indx(eng, E):
     """
     return np.searchsorted(get_bin_bound(eng),E)-1
 
+def _split_bin_ind(bin_ind, new_eng_size):
+    """Locates the bins below, above and within a new abscissa.
+
+    Parameters
+    ----------
+    bin_ind : ndarray
+        The bin indices of the old abscissa with respect to the new abscissa with an additional first bin, with -2 below and new_eng_size above it.
+    new_eng_size : int
+        The size of the new abscissa, including the additional bin.
+
+    Returns
+    -------
+    tuple of slice or ndarray
+        The indices of `bin_ind` below 0, above new_eng_size - 1 and in between. These are slices when `bin_ind` is increasing.
+    """
+    if np.all(bin_ind[1:] >= bin_ind[:-1]):
+        # For an increasing abscissa, each set of bins is contiguous.
+        split_low  = np.searchsorted(bin_ind, 0)
+        split_high = np.searchsorted(bin_ind, new_eng_size - 1, side='right')
+        return (
+            slice(0, split_low), slice(split_high, None),
+            slice(split_low, split_high)
+        )
+    return (
+        np.flatnonzero(bin_ind < 0),
+        np.flatnonzero(bin_ind == new_eng_size),
+        np.flatnonzero((bin_ind >= 0) & (bin_ind <= new_eng_size - 1))
+    )
+
 def rebin_N_arr(
     N_arr, in_eng, out_eng=None, spec_type='dNdE', log_bin_width=None
 ):
@@ -188,21 +218,17 @@ def rebin_N_arr(
     bin_ind = bin_ind_interp(in_eng)
 
     # Locate where bin_ind is below 0, above self.length-1 and in between.
-    ind_low = np.where(bin_ind < 0)
-    ind_high = np.where(bin_ind == new_eng.size)
-    ind_reg = np.where( (bin_ind >= 0) & (bin_ind <= new_eng.size - 1) )
+    ind_low, ind_high, ind_reg = _split_bin_ind(bin_ind, new_eng.size)
 
     # if ind_high[0].size > 0:
     #     raise OverflowError("the new abscissa lies below the old one: this function cannot handle overflow (yet?).")
 
-    # Get the total N and toteng in each bin
-    toteng_arr = N_arr*in_eng
-
+    # Get the total N in each bin, and the total energy in the bins below out_eng.
     N_arr_low = N_arr[ind_low]
     N_arr_high = N_arr[ind_high]
     N_arr_reg = N_arr[ind_reg]
 
-    toteng_arr_low = toteng_arr[ind_low]
+    toteng_arr_low = N_arr_low*in_eng[ind_low]
 
     # Bin width of the new array. Use only the log bin width, so that dN/dE = N/(E d log E)
     if log_bin_width is None:
@@ -216,19 +242,20 @@ def rebin_N_arr(
     # Regular bins first, done in a completely vectorized fashion.
 
     # reg_bin_low is the array of the lower bins to be allocated the particles in N_arr_reg, similarly reg_bin_upp. This should also take care of the fact that bin_ind is an integer.
-    reg_bin_low = np.floor(bin_ind[ind_reg]).astype(int)
+    bin_ind_reg = bin_ind[ind_reg]
+    reg_bin_low = np.floor(bin_ind_reg).astype(int)
     reg_bin_upp = reg_bin_low + 1
 
     # Takes care of the case where in_eng[-1] = out_eng[-1]
     reg_bin_low[reg_bin_low == new_eng.size-2] = new_eng.size - 3
     reg_bin_upp[reg_bin_upp == new_eng.size-1] = new_eng.size - 2
 
-    reg_N_low = (reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
-    reg_N_upp = (bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
+    reg_N_low = (reg_bin_upp - bin_ind_reg) * N_arr_reg
+    reg_N_upp = (bin_ind_reg - reg_bin_low) * N_arr_reg
 
-    reg_dNdE_low = ((reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
+    reg_dNdE_low = ((reg_bin_upp - bin_ind_reg) * N_arr_reg
                    /new_E_dlogE[reg_bin_low+1])
-    reg_dNdE_upp = ((bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
+    reg_dNdE_upp = ((bin_ind_reg - reg_bin_low) * N_arr_reg
                    /new_E_dlogE[reg_bin_upp+1])
 
     # Low bins.
@@ -242,13 +269,16 @@ def rebin_N_arr(
     eng_underflow = np.sum(toteng_arr_low) - eng_above_underflow
     low_dNdE = N_above_underflow/new_E_dlogE[1]
 
-    new_dNdE = np.zeros(new_eng.size)
+    # reg_dNdE_low = -1 refers to new_eng[0]. np.bincount accumulates repeated bin indices.
+    new_dNdE = (
+        np.bincount(
+            reg_bin_low+1, weights=reg_dNdE_low, minlength=new_eng.size
+        )
+        + np.bincount(
+            reg_bin_upp+1, weights=reg_dNdE_upp, minlength=new_eng.size
+        )
+    )
     new_dNdE[1] += low_dNdE
-    # reg_dNdE_low = -1 refers to new_eng[0]
-    np.add.at(new_dNdE, reg_bin_low+1, reg_dNdE_low)
-    np.add.at(new_dNdE, reg_bin_upp+1, reg_dNdE_upp)
-    # new_dNdE[reg_bin_low+1] += reg_dNdE_low
-    # new_dNdE[reg_bin_upp+1] += reg_dNdE_upp
 
     # Generate the new Spectrum.
 
@@ -262,6 +292,165 @@ def rebin_N_arr(
 
     return out_spec
 
+def rebin_N_2D_arr(N_arr, in_eng, out_eng, spec_type='dNdE'):
+    """Rebins a 2D array of particle number, one spectrum per row.
+
+    The rebinning conserves both total number and total energy, in the same way as :func:`rebin_N_arr`. Each spectrum may have its own energy abscissa, e.g. after redshifting each of them by a different amount.
+
+    Parameters
+    ----------
+    N_arr : ndarray of shape (N, M)
+        The number of particles in each bin, for each of the N spectra.
+    in_eng : ndarray of length M or shape (N, M)
+        The energy abscissa of each bin, shared by all of the spectra or for each spectrum. The total energy in bin `(i, j)` should be `N_arr[i, j]*in_eng[i, j]`.
+    out_eng : ndarray
+        The new abscissa to bin into.
+    spec_type : {'N', 'dNdE'}, optional
+        The spectrum type to be output. Default is 'dNdE'.
+
+    Returns
+    -------
+    tuple of ndarray
+        The rebinned spectra with shape (N, out_eng.size), and the number and energy of particles assigned to the underflow for each spectrum.
+
+    Notes
+    -----
+    Particles in a bin above the highest bin in `out_eng` are discarded, with a warning.
+
+    See Also
+    --------
+    rebin_N_arr
+    """
+
+    # in_eng is not broadcast to the shape of N_arr: when it is shared by all of the spectra, the bin indices and weights below are only computed once, and broadcast against N_arr.
+    N_arr = np.atleast_2d(N_arr)
+    in_eng = np.asarray(in_eng)
+
+    if not np.all(np.diff(out_eng) > 0):
+        raise TypeError("new abscissa must be ordered in increasing energy.")
+
+    # Add an additional bin at the lower end of out_eng so that underflow can be treated easily. Forces out_eng to be float, avoids strange problems with np.insert if out_eng is of type int. 
+
+    out_eng = out_eng.astype(float)
+
+    first_bin_eng = np.exp(np.log(out_eng[0]) - (np.log(out_eng[1]) - np.log(out_eng[0])))
+    new_eng = np.insert(out_eng, 0, first_bin_eng)
+
+    # Find the relative bin indices for in_eng wrt new_eng. The first bin in new_eng has bin index -1. Underflow has index -2, overflow corresponds to new_eng.size.
+
+    bin_ind = np.interp(
+        in_eng, new_eng, np.arange(new_eng.size)-1, 
+        left = -2, right = new_eng.size
+    )
+
+    if np.any(bin_ind == new_eng.size):
+        warnings.warn("The new abscissa lies below the old one: only bins that lie within the new abscissa will be rebinned, bins above the abscissa will be discarded.", RuntimeWarning)
+
+    # Factor depends on the spec_type.
+    if spec_type == 'dNdE':
+        # E dlog E of the new array.
+        fac = new_eng * get_log_bin_width(new_eng)
+    elif spec_type == 'N':
+        fac = np.ones_like(new_eng)
+    else:
+        raise TypeError('invalid spec_type.')
+
+    if in_eng.ndim == 1:
+        # Locate where bin_ind is below 0, above new_eng.size-1 and in between. These are the same for all of the spectra, so only those columns of N_arr are used.
+        ind_low, _, ind_reg = _split_bin_ind(bin_ind, new_eng.size)
+
+        # Low bins. The number assigned to the first bin, the total number and the total energy are obtained in a single product, which reads N_arr once.
+        bin_ind_low = bin_ind[ind_low]
+        N_above_underflow, N_low, eng_low = (
+            N_arr[:, ind_low] @ np.stack((
+                bin_ind_low - np.floor(bin_ind_low),
+                np.ones_like(bin_ind_low), in_eng[ind_low]
+            ), axis=1)
+        ).T
+        N_underflow = N_low - N_above_underflow
+        eng_underflow = eng_low - N_above_underflow * new_eng[1]
+
+        # Regular bins. reg_bin_low is the array of the lower bins to be allocated the particles in N_arr_reg, similarly reg_bin_upp. This should also take care of the fact that bin_ind is an integer.
+        reg_ind = np.arange(bin_ind.size)[ind_reg]
+        bin_ind_reg = bin_ind[reg_ind]
+        reg_bin_low = np.floor(bin_ind_reg).astype(int)
+        reg_bin_upp = reg_bin_low + 1
+
+        # Takes care of the case where in_eng[-1] = out_eng[-1]
+        reg_bin_low[reg_bin_low == new_eng.size-2] = new_eng.size - 3
+        reg_bin_upp[reg_bin_upp == new_eng.size-1] = new_eng.size - 2
+
+        # With a shared abscissa, the particles in each bin are split between the same two new bins for every spectrum, so rebinning is a product with a single sparse matrix. This avoids forming the (N, M) arrays of split particles.
+        rebin_mat = sparse.csr_matrix(
+            (
+                np.concatenate((
+                    (reg_bin_upp - bin_ind_reg) / fac[reg_bin_low+1],
+                    (bin_ind_reg - reg_bin_low) / fac[reg_bin_upp+1]
+                )),
+                (
+                    np.concatenate((reg_ind, reg_ind)), 
+                    np.concatenate((reg_bin_low+1, reg_bin_upp+1))
+                )
+            ), 
+            shape=(in_eng.size, new_eng.size)
+        )
+        new_data = np.asarray(N_arr @ rebin_mat)
+    else:
+        # Locate where bin_ind is below 0, above new_eng.size-1 and in between. The rows do not have the same number of entries in each, so entries outside of each mask are set to zero instead of being removed.
+        ind_low = bin_ind < 0
+        ind_reg = (bin_ind >= 0) & (bin_ind <= new_eng.size - 1)
+
+        # Low bins. einsum avoids forming the products before summing.
+        N_arr_low = np.where(ind_low, N_arr, 0)
+        bin_ind_floor = np.floor(bin_ind)
+        N_above_underflow = np.einsum(
+            'ij,ij->i', bin_ind - bin_ind_floor, N_arr_low
+        )
+        N_underflow = np.sum(N_arr_low, axis=1) - N_above_underflow
+        eng_underflow = (
+            np.einsum('ij,ij->i', N_arr_low, in_eng)
+            - N_above_underflow * new_eng[1]
+        )
+
+        # Regular bins, as above.
+        reg_bin_low = np.where(ind_reg, bin_ind_floor, 0).astype(int)
+        reg_bin_upp = reg_bin_low + 1
+
+        # Takes care of the case where in_eng[-1] = out_eng[-1]
+        reg_bin_low[reg_bin_low == new_eng.size-2] = new_eng.size - 3
+        reg_bin_upp[reg_bin_upp == new_eng.size-1] = new_eng.size - 2
+
+        # Split the particles between the lower and upper bins. The
+        # products are accumulated in place, and 1/fac is looked up
+        # instead of dividing by fac.
+        N_arr_reg = np.where(ind_reg, N_arr, 0)
+        inv_fac = 1/fac
+        reg_data_low = reg_bin_upp - bin_ind
+        reg_data_low *= inv_fac[reg_bin_low+1]
+        reg_data_low *= N_arr_reg
+        reg_data_upp = bin_ind - reg_bin_low
+        reg_data_upp *= inv_fac[reg_bin_upp+1]
+        reg_data_upp *= N_arr_reg
+        # Each row is offset by new_eng.size, so that a single 
+        # np.bincount adds up all of the rows.
+        row_offset = new_eng.size * np.arange(N_arr.shape[0])[:, None]
+        new_data = np.reshape(
+            np.bincount(
+                np.concatenate((
+                    (row_offset + reg_bin_low + 1).ravel(), 
+                    (row_offset + reg_bin_upp + 1).ravel()
+                )), 
+                weights=np.concatenate(
+                    (reg_data_low.ravel(), reg_data_upp.ravel())
+                ), 
+                minlength=N_arr.shape[0]*new_eng.size
+            ), 
+            (N_arr.shape[0], new_eng.size)
+        )
+    new_data[:,1] += N_above_underflow/fac[1]
+
+    return new_data[:,1:], N_underflow, eng_underflow
+
 
 def discretize(eng, func_dNdE, *args):
     """Discretizes a continuous function. 
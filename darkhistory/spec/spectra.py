@@ -4,14 +4,72 @@ import numpy as np
 from darkhistory import utilities as utils
 from darkhistory.spec.spectools import get_log_bin_width
 from darkhistory.spec.spectools import rebin_N_arr
+from darkhistory.spec.spectools import rebin_N_2D_arr
 from darkhistory.spec.spectrum import Spectrum
 from darkhistory.spec.spectools import get_bin_bound
 
 import matplotlib.pyplot as plt
-import warnings
 
 from scipy import interpolate
 
+def _sum_between_bin_bounds(vals, bound_arr):
+    """Sums a histogram between bin boundaries, for each row of vals.
+
+    Parameters
+    ----------
+    vals : ndarray of shape (N, M)
+        The contents of each bin, for each of the N histograms.
+    bound_arr : ndarray of length B
+        Increasing bin boundaries, with 0 being the left most boundary, 1 the right-hand of the first bin and so on. Partial bins are included linearly, and bounds outside of [0:M] include nothing beyond the histogram.
+
+    Returns
+    -------
+    ndarray of shape (B-1, N)
+        The sum between each pair of successive boundaries.
+    """
+
+    length = vals.shape[-1]
+
+    low = np.clip(bound_arr[:-1], 0, length)
+    upp = np.clip(bound_arr[1:],  0, length)
+
+    low_ceil  = np.ceil(low).astype(int)
+    low_floor = np.floor(low).astype(int)
+    upp_ceil  = np.ceil(upp).astype(int)
+    upp_floor = np.floor(upp).astype(int)
+
+    # reduceat needs indices below length, so the last bin is added 
+    # separately when upp_floor is length. This avoids padding a copy of 
+    # vals with an empty bin.
+    last = length - 1
+    low_ind = np.minimum(low_ceil,  last)
+    upp_ind = np.minimum(upp_floor, last)
+
+    # Sum the bins that are completely between the bounds. reduceat sums
+    # between successive indices, so the sums from low_ind to upp_ind
+    # are the even entries. reduceat returns vals[:,low_ind] if 
+    # low_ind >= upp_ind, and these are set to zero.
+    full_bins = np.add.reduceat(
+        vals, np.stack((low_ind, upp_ind), axis=-1).ravel(), axis=1
+    )[:, ::2]
+    full_bins[:, low_ind >= upp_ind] = 0
+    incl_last = (upp_floor == length) & (low_ceil <= last)
+    full_bins[:, incl_last] += vals[:, [last]]
+
+    # Bin indices are within the same bin. The second requirement 
+    # covers the case where upp_ceil is length.
+    same_bin = (low_floor == upp_floor) | (low_ceil == upp_ceil)
+
+    # Add up part of the bin for the low partial bin and the high partial 
+    # bin. If upp_floor is length, then upp - upp_floor is zero, and there
+    # is no partial bin for the upper index. 
+    part_bins = vals[:, np.minimum(low_floor, last)] * np.where(
+        same_bin, upp - low, low_ceil - low
+    )
+    part_bins += vals[:, upp_ind] * np.where(same_bin, 0, upp - upp_floor)
+
+    return np.transpose(full_bins + part_bins)
+
 class Spectra:
     """Structure for a collection of :class:`.Spectrum` objects.
 
@@ -19,8 +77,9 @@ class Spectra:
     particles at different redshifts, or as a collection of spectra produced 
     by injected particles over a range of energies. 
 
-    Individual :class:`.Spectrum` objects can be accessed by taking slices
-    of the :class:`Spectra` object.
+    Individual :class:`.Spectrum` objects can be accessed by indexing the 
+    :class:`Spectra` object. Taking a slice returns a new :class:`Spectra` 
+    with a copy of the data of the original. 
 
     Parameters
     ----------
@@ -104,7 +163,7 @@ class Spectra:
             else:
                 if in_eng.size != spec_arr.shape[0]:
                     raise TypeError('in_eng array not the same shape as first axis of spec_arr.')
-                self._in_eng = in_eng
+                self._in_eng = np.asarray(in_eng, dtype=float)
             if rs is None:
                 self._rs = -1.*np.ones_like(
                     self._grid_vals[:,0]
@@ -112,7 +171,9 @@ class Spectra:
             else:
                 if rs.size != spec_arr.shape[0]:
                     raise TypeError('rs array not the same shape as first axis of spec_arr.')
-                self._rs = rs
+                self._rs = np.asarray(rs, dtype=float)
+            # Underflow is always float, even if e.g. rs is given as 
+            # an array of integers.
             self._N_underflow = np.zeros_like(self._rs)
             self._eng_underflow = np.zeros_like(self._rs)
 
@@ -134,14 +195,19 @@ class Spectra:
             )
             self._spec_type = spec_arr[0].spec_type
             self._eng = spec_arr[0].eng
-            self._in_eng = np.array([spec.in_eng for spec in spec_arr])
-            self._rs = np.array([spec.rs for spec in spec_arr])
-            self._N_underflow = np.array(
-                [spec.underflow['N'] for spec in spec_arr]
-            )
-            self._eng_underflow = np.array(
-                [spec.underflow['eng'] for spec in spec_arr]
-            )
+            # Gather all of the metadata in one pass over spec_arr. 
+            # Transposing and copying keeps each row contiguous.
+            (
+                self._in_eng, self._rs, 
+                self._N_underflow, self._eng_underflow
+            ) = np.array(
+                [
+                    (
+                        spec.in_eng, spec.rs, 
+                        spec.underflow['N'], spec.underflow['eng']
+                    ) for spec in spec_arr
+                ], dtype=float
+            ).T.copy()
 
             if rebin_eng is not None:
                 self.rebin(rebin_eng)
@@ -162,6 +228,29 @@ class Spectra:
     def eng(self):
         return self._eng
 
+    def _bin_widths(self):
+        """The log bin width of eng, and eng times the log bin width.
+
+        These are only recomputed when eng is reassigned, and should not be modified. 
+        """
+        # getattr, since instances created by unpickling do not go 
+        # through __init__.
+        if getattr(self, '_log_bin_width_eng', None) is not self._eng:
+            log_bin_width = get_log_bin_width(self._eng)
+            self._log_bin_width_cache = (
+                log_bin_width, self._eng*log_bin_width
+            )
+            self._log_bin_width_eng   = self._eng
+        return self._log_bin_width_cache
+
+    @property
+    def _log_bin_width(self):
+        return self._bin_widths()[0]
+
+    @property
+    def _eng_log_bin_width(self):
+        return self._bin_widths()[1]
+
     @property
     def in_eng(self):
         return self._in_eng
@@ -186,6 +275,15 @@ class Spectra:
     def eng_underflow(self):
         return self._eng_underflow
 
+    def __getstate__(self):
+        # The spare rows kept by append are not worth storing, and an
+        # unpickled instance does not own its grid_vals until it copies
+        # them.
+        state = self.__dict__.copy()
+        state.pop('_append_bufs', None)
+        state.pop('_owned_grid_vals', None)
+        return state
+
     def __iter__(self):
         return iter([
             Spectrum(
@@ -199,7 +297,7 @@ class Spectra:
 
     def __getitem__(self, key):
 
-        if np.issubdtype(type(key), np.int64):
+        if isinstance(key, (int, np.integer)):
             out_spec = Spectrum(
                 self.eng, self._grid_vals[key],
                 in_eng=self._in_eng[key], rs=self._rs[key],
@@ -210,21 +308,18 @@ class Spectra:
                 out_spec.underflow['eng'] = self.eng_underflow[key]
             return out_spec
         elif isinstance(key, slice):
-            data_arr          = self._grid_vals[key]
-            in_eng_arr        = in_eng
-            rs_arr            = rs
-            N_underflow_arr   = self._N_underflow[key]
-            eng_underflow_arr = self._eng_underflow[key]
-            out_spec_list = [
-                Spectrum(self.eng, data, in_eng, rs) for (spec, in_eng, rs)
-                    in zip(data_arr, in_eng_arr, rs_arr)
-            ]
-            for (spec,N,eng) in zip(
-                out_spec_list, N_underflow_arr, eng_underflow_arr
-            ):
-                spec.underflow['N'] = N
-                spec.underflow['eng'] = eng
-            return out_spec_list
+            # Copies of the sliced arrays, without constructing any
+            # Spectrum. The arrays are copied so that modifying the
+            # slice, e.g. with __setitem__, leaves this Spectra unchanged.
+            out_spectra = Spectra([])
+            out_spectra._eng = self.eng
+            out_spectra._spec_type = self.spec_type
+            out_spectra._grid_vals = self._grid_vals[key].copy()
+            out_spectra._in_eng = self._in_eng[key].copy()
+            out_spectra._rs = self._rs[key].copy()
+            out_spectra._N_underflow = self._N_underflow[key].copy()
+            out_spectra._eng_underflow = self._eng_underflow[key].copy()
+            return out_spectra
         else:
             raise TypeError("indexing is invalid.")
 
@@ -241,8 +336,11 @@ class Spectra:
     #next = __next__
 
     def __setitem__(self, key, value):
-        if np.issubdtype(type(key), int):
-            if not np.array_equal(value.eng, self.eng):
+        if isinstance(key, (int, np.integer)):
+            if (
+                value.eng is not self.eng
+                and not np.array_equal(value.eng, self.eng)
+            ):
                     raise TypeError("the energy abscissa of the new Spectrum does not agree with this Spectra.")
             self._in_eng[key] = value.in_eng
             self._rs[key] = value.rs
@@ -253,17 +351,140 @@ class Spectra:
             self._N_underflow[key] = value.underflow['N']
             self._eng_underflow[key] = value.underflow['eng']
         elif isinstance(key, slice):
-            for i,spec in zip(key, value):
-                if not np.array_equal(value.eng, self.eng):
+            for spec in value:
+                if (
+                    spec.eng is not self.eng
+                    and not np.array_equal(spec.eng, self.eng)
+                ):
                     raise TypeError("the energy abscissa of the new Spectrum does not agree with this Spectra.")
-                self._in_eng[i] = spec.in_eng
-                self._rs[i] = spec.rs
-                if self.spec_type == 'N':
-                    self._grid_vals[i] = spec.N
-                elif self.spec_type == 'dNdE':
-                    self._grid_vals[i] = spec.dNdE
-                self._N_underflow[i] = spec.underflow['N']
-                self._eng_underflow[i] = spec.underflow['eng']
+            # Stack the new spectra and assign them all at once.
+            self._in_eng[key] = np.array([spec.in_eng for spec in value])
+            self._rs[key] = np.array([spec.rs for spec in value])
+            if self.spec_type == 'N':
+                self._grid_vals[key] = np.stack([spec.N for spec in value])
+            elif self.spec_type == 'dNdE':
+                self._grid_vals[key] = np.stack(
+                    [spec.dNdE for spec in value]
+                )
+            self._N_underflow[key] = np.array(
+                [spec.underflow['N'] for spec in value]
+            )
+            self._eng_underflow[key] = np.array(
+                [spec.underflow['eng'] for spec in value]
+            )
+
+    def _own_grid_vals(self, other=0.):
+        """Makes grid_vals an array owned by this instance, before it is modified in place.
+
+        grid_vals can be the array passed to the constructor, be shared with another :class:`Spectra`, or have an integer type. It is then copied once, to a float type that can also hold the result with `other`, and later in-place operations on this instance reuse the copy.
+
+        Parameters
+        ----------
+        other : ndarray, float or int, optional
+            The other operand of the in-place operation.
+
+        Returns
+        -------
+        ndarray
+            The owned grid_vals.
+        """
+        dtype = np.result_type(self._grid_vals, other, float)
+        # The id of this instance is stored, so that a shallow copy does
+        # not modify the grid_vals of the original. getattr, since
+        # instances created by unpickling do not go through __init__.
+        owner, owned = getattr(self, '_owned_grid_vals', (None, None))
+        if (
+            owner != id(self) or owned is not self._grid_vals
+            or owned.dtype != dtype
+        ):
+            self._grid_vals = self._grid_vals.astype(dtype)
+            self._owned_grid_vals = (id(self), self._grid_vals)
+        return self._grid_vals
+
+    def _binop(self, other, op, out=None):
+        """Adds or subtracts another :class:`Spectra` using the ufunc op.
+
+        Parameters
+        ----------
+        other : Spectra
+            The :class:`Spectra` on the right of the operation.
+        op : {np.add, np.subtract}
+            The operation to perform.
+        out : ndarray, optional
+            If specified, the spectra are stored in out, e.g. ``self.grid_vals`` for an in-place operation.
+
+        Returns
+        -------
+        Spectra
+            New :class:`Spectra` instance, or the current instance if out is specified.
+
+        """
+        if not np.array_equal(self.eng, other.eng):
+            raise TypeError('abscissae are different for the two spectra.')
+
+        if self.spec_type != other.spec_type:
+            raise TypeError('adding spectra of N to spectra of dN/dE.')
+
+        if out is not None:
+            op(self.grid_vals, other.grid_vals, out=out)
+            self._grid_vals = out
+            self._N_underflow = op(self.N_underflow, other.N_underflow)
+            self._eng_underflow = op(
+                self.eng_underflow, other.eng_underflow
+            )
+
+            return self
+
+        out_spectra = Spectra([])
+        out_spectra._spec_type = self.spec_type
+        out_spectra._grid_vals = op(self.grid_vals, other.grid_vals)
+        out_spectra._eng = self.eng
+        if np.array_equal(self.in_eng, other.in_eng):
+            out_spectra._in_eng = self.in_eng
+        if np.array_equal(self.rs, other.rs):
+            out_spectra._rs = self.rs
+
+        out_spectra._N_underflow = op(self.N_underflow, other.N_underflow)
+        out_spectra._eng_underflow = op(
+            self.eng_underflow, other.eng_underflow
+        )
+
+        return out_spectra
+
+    def _prodop(self, other, op):
+        """Multiplies or divides by another :class:`Spectra` using the ufunc op.
+
+        Parameters
+        ----------
+        other : Spectra
+            The :class:`Spectra` on the right of the operation.
+        op : {np.multiply, np.divide}
+            The operation to perform.
+
+        Returns
+        -------
+        Spectra
+            New :class:`Spectra` instance, with underflow set to zero.
+
+        """
+        if not np.array_equal(self.eng, other.eng):
+            raise TypeError('the two spectra do not have the same abscissa.')
+
+        out_spectra = Spectra([])
+        out_spectra._eng = self.eng
+        if np.array_equal(self.in_eng, other.in_eng):
+            out_spectra._in_eng = self.in_eng
+        if np.array_equal(self.rs, other.rs):
+            out_spectra._rs = self.rs
+        if self.spec_type == other.spec_type:
+            out_spectra._spec_type = self.spec_type
+        # A single pass over the grids, without an intermediate 
+        # array of reciprocals for division.
+        out_spectra._grid_vals = op(self.grid_vals, other.grid_vals)
+        out_spectra._N_underflow = self.N_underflow*0
+        out_spectra._eng_underflow = self.eng_underflow*0
+
+        return out_spectra
 
     def __add__(self, other):
         """Adds two :class:`Spectra` instances together, or an array to the :class:`Spectra`. The :class:`Spectra` is on the left.
@@ -289,29 +510,9 @@ class Spectra:
         :meth:`Spectra.__radd__`
 
         """
-        if np.issubclass_(type(other), Spectra):
-
-            if not np.array_equal(self.eng, other.eng):
-                raise TypeError('abscissae are different for the two spectra.')
+        if isinstance(other, Spectra):
 
-            if self.spec_type != other.spec_type:
-                raise TypeError('adding spectra of N to spectra of dN/dE.')
-
-            out_spectra = Spectra([])
-            out_spectra._spec_type = self.spec_type
-            out_spectra._grid_vals = self.grid_vals + other.grid_vals
-            out_spectra._eng = self.eng
-            if np.array_equal(self.in_eng, other.in_eng):
-                out_spectra._in_eng = self.in_eng
-            if np.array_equal(self.rs, other.rs):
-                out_spectra._rs = self.rs
-
-            out_spectra._N_underflow = self.N_underflow + other.N_underflow
-            out_spectra._eng_underflow = (
-                self.eng_underflow + other.eng_underflow
-            )
-
-            return out_spectra
+            return self._binop(other, np.add)
 
         elif isinstance(other, np.ndarray):
 
@@ -345,7 +546,7 @@ class Spectra:
         --------
         :meth:`Spectra.__add__`
         """
-        if npissubclass_(type(other), Spectra):
+        if isinstance(other, Spectra):
 
             if not np.array_equal(self.eng, other.eng):
                 raise TypeError('abscissae are different from the two spectra.')
@@ -402,6 +603,10 @@ class Spectra:
         :meth:`Spectra.__rsub__`
         """
 
+        if isinstance(other, Spectra):
+            # Subtract directly, without forming -1*other first.
+            return self._binop(other, np.subtract)
+
         return self + -1*other
 
     def __rsub__(self, other):
@@ -428,6 +633,83 @@ class Spectra:
 
         return other + -1*self
 
+    def __iadd__(self, other):
+        """Adds a :class:`Spectra` or array to this :class:`Spectra` in place.
+
+        Parameters
+        ----------
+        other : Spectra or ndarray
+            The object to add to the current :class:`Spectra` object.
+
+        Returns
+        -------
+        Spectra
+            The current :class:`Spectra` instance, with the summed spectra.
+
+        Notes
+        -----
+        This special function allows the use of the symbol ``+=`` without creating a new :class:`Spectra`. The underflow is reset to zero if other is not a :class:`Spectra` object, and `in_eng` and `rs` are left unchanged.
+
+        The first in-place operation copies grid_vals to a float array owned by this instance, so that arrays passed to the constructor, or shared with another :class:`Spectra` such as the one this was sliced from, are never modified. Later in-place operations reuse the copy.
+
+        See Also
+        --------
+        :meth:`Spectra.__add__`
+        """
+        if isinstance(other, Spectra):
+
+            return self._binop(
+                other, np.add, out=self._own_grid_vals(other.grid_vals)
+            )
+
+        elif isinstance(other, np.ndarray):
+
+            np.add(
+                self._own_grid_vals(other), other, out=self._grid_vals
+            )
+            self._N_underflow = np.zeros_like(self._N_underflow)
+            self._eng_underflow = np.zeros_like(self._eng_underflow)
+
+            return self
+
+        else:
+            raise TypeError('adding an object that is not compatible.')
+
+    def __isub__(self, other):
+        """Subtracts a :class:`Spectra` or array from this :class:`Spectra` in place.
+
+        Parameters
+        ----------
+        other : Spectra or ndarray
+            The object to subtract from the current :class:`Spectra` object.
+
+        Returns
+        -------
+        Spectra
+            The current :class:`Spectra` instance, with the subtracted spectra.
+
+        Notes
+        -----
+        As with :meth:`Spectra.__iadd__`, grid_vals is copied before the first in-place operation.
+
+        See Also
+        --------
+        :meth:`Spectra.__iadd__`
+        """
+        if isinstance(other, Spectra):
+
+            return self._binop(
+                other, np.subtract,
+                out=self._own_grid_vals(other.grid_vals)
+            )
+
+        elif isinstance(other, np.ndarray):
+
+            return self.__iadd__(-other)
+
+        else:
+            raise TypeError('subtracting an object that is not compatible.')
+
     def __neg__(self):
         """Negates the spectra.
 
@@ -485,33 +767,15 @@ class Spectra:
             out_spectra._in_eng = self.in_eng
             out_spectra._rs = self.rs
             out_spectra._spec_type = self.spec_type
-            out_spectra._grid_vals = np.einsum(
-                'ij,i->ij',self.grid_vals, other
-            )
+            out_spectra._grid_vals = self.grid_vals*other[:,None]
             out_spectra._N_underflow = self.N_underflow*0
             out_spectra._eng_underflow = self.eng_underflow*0
 
             return out_spectra
 
-        elif np.issubclass_(type(other), Spectra):
+        elif isinstance(other, Spectra):
 
-            if not np.array_equal(self.eng, other.eng):
-                raise TypeError('the two spectra do not have the same abscissa.')
-
-            out_spectra = Spectra([])
-            out_spectra._eng = self.eng
-            if np.array_equal(self.in_eng, other.in_eng):
-                out_spectra._in_eng = self.in_eng
-            if np.array_equal(self.rs, other.rs):
-                out_spectra._rs = self.rs
-            if self.spec_type == other.spec_type:
-                out_spectra._spec_type = self.spec_type
-            out_spectra._grid_vals = (
-                self.grid_vals * other.grid_vals
-            )
-            out_spectra._N_underflow = self.N_underflow*0
-            out_spectra._eng_underflow = self.eng_underflow*0
-            return out_spectra
+            return self._prodop(other, np.multiply)
 
     def __rmul__(self, other):
         """Takes a product with the spectra with a :class:`Spectra` object, array or number.
@@ -558,15 +822,13 @@ class Spectra:
             out_spectra._in_eng = self.in_eng
             out_spectra._rs = self.rs
             out_spectra._spec_type = self.spec_type
-            out_spectra._grid_vals = np.einsum(
-                'ij,i->ij',self.grid_vals, other
-            )
+            out_spectra._grid_vals = self.grid_vals*other[:,None]
             out_spectra._N_underflow = self.N_underflow*0
             out_spectra._eng_underflow = self.eng_underflow*0
 
             return out_spectra
 
-        elif np.issubclass_(type(other), Spectra):
+        elif isinstance(other, Spectra):
 
             if not np.array_equal(self.eng, other.eng):
                 raise TypeError('the two spectra do not have the same abscissa.')
@@ -606,16 +868,8 @@ class Spectra:
         --------
         :meth:`Spectra.__rtruediv__`
         """
-        if np.issubclass_(type(other), Spectra):
-            inv_spectra = Spectra([])
-            inv_spectra._eng = other.eng
-            inv_spectra._in_eng = other.in_eng
-            inv_spectra._grid_vals = 1/other.grid_vals
-            inv_spectra._rs = other.rs
-            inv_spectra._spec_type = other.spec_type
-            inv_spectra._N_underflow = 0
-            inv_spectra._eng_underflow = 0
-            return self * inv_spectra
+        if isinstance(other, Spectra):
+            return self._prodop(other, np.divide)
         else:
             return self * (1/other)
 
@@ -651,6 +905,99 @@ class Spectra:
 
         return other * inv_spectra
 
+    def __imul__(self, other):
+        """Multiplies this :class:`Spectra` in place by a :class:`Spectra` object, array or number.
+
+        Parameters
+        ----------
+        other : Spectra, int, float or ndarray
+            The object to multiply the current :class:`Spectra` object by.
+
+        Returns
+        -------
+        Spectra
+            The current :class:`Spectra` instance, with the multiplied spectra.
+
+        Notes
+        -----
+        This special function allows the use of the symbol ``*=`` without creating a new :class:`Spectra`. As with :meth:`Spectra.__mul__`, the underflow is multiplied by a number, and set to zero otherwise. As with :meth:`Spectra.__iadd__`, grid_vals is copied before the first in-place operation.
+
+        See Also
+        --------
+        :meth:`Spectra.__mul__`
+        """
+        if np.isscalar(other):
+
+            np.multiply(
+                self._own_grid_vals(other), other, out=self._grid_vals
+            )
+            self._N_underflow = self.N_underflow*other
+            self._eng_underflow = self.eng_underflow*other
+
+        elif isinstance(other, np.ndarray):
+
+            # Each spectrum is multiplied by one entry of other.
+            np.multiply(
+                self._own_grid_vals(other), other[:, None],
+                out=self._grid_vals
+            )
+            self._N_underflow = self.N_underflow*0
+            self._eng_underflow = self.eng_underflow*0
+
+        elif isinstance(other, Spectra):
+
+            if not np.array_equal(self.eng, other.eng):
+                raise TypeError('the two spectra do not have the same abscissa.')
+
+            np.multiply(
+                self._own_grid_vals(other.grid_vals), other.grid_vals,
+                out=self._grid_vals
+            )
+            self._N_underflow = self.N_underflow*0
+            self._eng_underflow = self.eng_underflow*0
+
+        else:
+            raise TypeError('multiplying by an object that is not compatible.')
+
+        return self
+
+    def __itruediv__(self, other):
+        """Divides this :class:`Spectra` in place by another object.
+
+        Parameters
+        ----------
+        other : ndarray, float, int or Spectra
+
+        Returns
+        -------
+        Spectra
+            The current :class:`Spectra` instance, with the divided spectra.
+
+        Notes
+        -----
+        As with :meth:`Spectra.__iadd__`, grid_vals is copied before the first in-place operation.
+
+        See Also
+        --------
+        :meth:`Spectra.__imul__`
+        """
+        if isinstance(other, Spectra):
+
+            if not np.array_equal(self.eng, other.eng):
+                raise TypeError('the two spectra do not have the same abscissa.')
+
+            np.divide(
+                self._own_grid_vals(other.grid_vals), other.grid_vals,
+                out=self._grid_vals
+            )
+            self._N_underflow = self.N_underflow*0
+            self._eng_underflow = self.eng_underflow*0
+
+            return self
+
+        else:
+            return self.__imul__(1/other)
+
     def switch_spec_type(self, target=None):
         """Switches between the type of values to be stored.
 
@@ -659,12 +1006,14 @@ class Spectra:
         target : {'N', 'dNdE'}
             The target type to switch to. 
         """
-        log_bin_width = get_log_bin_width(self.eng)
+        # A new array is made rather than working in place, since 
+        # grid_vals may be shared, e.g. with the array passed to the 
+        # constructor or with a sliced Spectra.
         if self.spec_type == 'N' and not target == 'N':
-            self._grid_vals = self.grid_vals/(self.eng * log_bin_width)
+            self._grid_vals = self.grid_vals/self._eng_log_bin_width
             self._spec_type = 'dNdE'
         elif self.spec_type == 'dNdE' and not target == 'dNdE':
-            self._grid_vals = self.grid_vals*self.eng*log_bin_width
+            self._grid_vals = self.grid_vals*self._eng_log_bin_width
             self._spec_type = 'N'
 
     def redshift(self, rs_arr):
@@ -701,20 +1050,27 @@ class Spectra:
         if rs_arr.size != self.rs.size:
             raise TypeError('rs_arr must have the same size as the number of Spectrum objects stored.')
 
-        for i,(rs, new_rs, in_eng) in enumerate(
-            zip(self.rs, rs_arr, self.in_eng)
-        ):
-            spec = Spectrum(
-                self.eng, self.grid_vals[i],
-                rs=rs, in_eng=in_eng,
-                spec_type=self.spec_type
-            )
+        if np.any(self.rs <= 0):
+            raise ValueError('self.rs must be initialized.')
 
-            spec.redshift(new_rs)
-            self._grid_vals[i] = spec._data
-            self._N_underflow[i] += spec.underflow['N']
-            self._eng_underflow[i] += spec.underflow['eng']
+        fac = rs_arr/self.rs
 
+        # Redshifting scales the abscissa of each spectrum by fac, but 
+        # leaves the number of particles in each bin unchanged. All of 
+        # the spectra are then rebinned to the original abscissa at once.
+        if self.spec_type == 'N':
+            N_arr = self.grid_vals
+        else:
+            N_arr = self.totN('bin')
+
+        new_data, N_underflow, eng_underflow = rebin_N_2D_arr(
+            N_arr, np.outer(fac, self.eng), self.eng, 
+            spec_type=self.spec_type
+        )
+
+        self._grid_vals = new_data
+        self._N_underflow = self._N_underflow + N_underflow
+        self._eng_underflow = self._eng_underflow + eng_underflow
 
         self._rs = rs_arr
 
@@ -760,17 +1116,13 @@ class Spectra:
         :meth:`Spectra.toteng`
 
         """
-        log_bin_width = get_log_bin_width(self.eng)
+        log_bin_width = self._log_bin_width
 
         # Using the broadcasting rules here.
         if self.spec_type == 'dNdE':
-            dNdlogE = np.einsum(
-                'ij,j->ij',self.grid_vals,self.eng
-            )
+            dNdlogE = self.grid_vals*self.eng
         elif self.spec_type == 'N':
-            dNdlogE = np.einsum(
-                'ij,j->ij', self.grid_vals, 1/log_bin_width
-            )
+            dNdlogE = self.grid_vals/log_bin_width
 
         if bound_type is not None:
 
@@ -780,64 +1132,14 @@ class Spectra:
 
             if bound_type == 'bin':
 
-                if not all(np.diff(bound_arr) >= 0):
+                if not np.all(np.diff(bound_arr) >= 0):
                     raise TypeError('bound_arr must have increasing entries.')
 
                 # Size is number of totals requested x number of Spectrums.
-                N_in_bin = np.zeros((bound_arr.size - 1, self.in_eng.size))
-
-                if bound_arr[0] > self.eng.size or bound_arr[-1] < 0:
-                    return N_in_bin
-
-                for i, (low,upp) in enumerate(
-                    zip(bound_arr[:-1], bound_arr[1:])
-                ):
-
-                    # Set the lower and upper bounds, including case where
-                    # low and upp are outside of the bins.
-                    if low > self.eng.size or upp < 0:
-                        continue
-
-                    low_ceil  = int(np.ceil(low))
-                    low_floor = int(np.floor(low))
-                    upp_ceil  = int(np.ceil(upp))
-                    upp_floor = int(np.floor(upp))
-
-                    # Sum the bins that are completely between the bounds.
-
-                    N_full_bins = np.dot(
-                        dNdlogE[:,low_ceil:upp_floor],
-                        log_bin_width[low_ceil:upp_floor]
-                    )
-
-                    N_part_bins = np.zeros_like(self.in_eng)
-
-                    if low_floor == upp_floor or low_ceil == upp_ceil:
-                        # Bin indices are within the same bin.
-                        # The second requirement covers the case where
-                        # upp_ceil is eng.size.
-                        N_part_bins += (
-                            dNdlogE[:,low_floor] * (upp - low)
-                            * log_bin_width[low_floor]
-                        )
-                    else:
-                        # Add up part of the bin for the low partial bin
-                        # and the high partial bin.
-                        N_part_bins += (
-                            dNdlogE[:,low_floor] * (low_ceil - low)
-                            * log_bin_width[low_floor]
-                        )
-                        if upp_floor < self.eng.size:
-                            # If upp_floor is eng.size then there is
-                            # no partial bin for the upper index.
-                            N_part_bins += (
-                                dNdlogE[:,upp_floor] * (upp - upp_floor)
-                                * log_bin_width[upp_floor]
-                            )
-
-                    N_in_bin[i] = N_full_bins + N_part_bins
-
-                return N_in_bin
+                # All of the totals are computed at once.
+                return _sum_between_bin_bounds(
+                    dNdlogE * log_bin_width, bound_arr
+                )
 
             if bound_type == 'eng':
                 bin_boundary = get_bin_bound(self.eng)
@@ -896,88 +1198,29 @@ class Spectra:
         :meth:`Spectra.totN`
 
         """
-        log_bin_width = get_log_bin_width(self.eng)
-
-        # Using the broadcasting rules here.
+        # The energy in each bin is grid_vals times a 1D weight, so 
+        # that grid_vals is only traversed once.
         if self.spec_type == 'dNdE':
-            dNdlogE = self.grid_vals * self.eng
+            eng_weight = self.eng * self._eng_log_bin_width
         elif self.spec_type == 'N':
-            dNdlogE = self.grid_vals / log_bin_width
+            eng_weight = self.eng.astype(float)
 
         if bound_type is not None:
 
             if bound_arr is None:
 
-                return dNdlogE * self.eng * log_bin_width
+                return self.grid_vals * eng_weight
 
             if bound_type == 'bin':
 
-                if not all(np.diff(bound_arr) >= 0):
+                if not np.all(np.diff(bound_arr) >= 0):
                     raise TypeError('bound_arr must have increasing entries.')
 
                 # Size is number of totals requested x number of Spectrums.
-                eng_in_bin = np.zeros((bound_arr.size - 1, self.in_eng.size))
-
-                if bound_arr[0] > self.eng.size or bound_arr[-1] < 0:
-                    return eng_in_bin
-
-                for i, (low,upp) in enumerate(
-                    zip(bound_arr[:-1], bound_arr[1:])
-                ):
-
-
-                    # Set the lower and upper bounds, including case where
-                    # low and upp are outside of the bins.
-                    if low > self.eng.size or upp < 0:
-                        continue
-
-                    low_ceil  = int(np.ceil(low))
-                    low_floor = int(np.floor(low))
-                    upp_ceil  = int(np.ceil(upp))
-                    upp_floor = int(np.floor(upp))
-
-
-                    # Sum the bins that are completely between the bounds.
-
-                    eng_full_bins = np.dot(
-                        dNdlogE[:,low_ceil:upp_floor]
-                        * self.eng[low_ceil:upp_floor],
-                        log_bin_width[low_ceil:upp_floor]
-                    )
-
-                    eng_part_bins = np.zeros_like(self.in_eng)
-
-                    if low_floor == upp_floor or low_ceil == upp_ceil:
-
-                        # Bin indices are within the same bin. The second
-                        # requirement covers the case where upp_ceil is
-                        # eng.size.
-
-                        eng_part_bins += (
-                            dNdlogE[:,low_floor] * (upp - low)
-                            * self.eng[low_floor] * log_bin_width[low_floor]
-                        )
-
-                    else:
-                        # Add up part of the bin for the low partial bin
-                        # and the high partial bin.
-                        eng_part_bins += (
-                            dNdlogE[:,low_floor] * (low_ceil - low)
-                            * self.eng[low_floor] * log_bin_width[low_floor]
-                        )
-
-                        if upp_floor < self.eng.size:
-                            # If upp_floor is eng.size, then there is no
-                            # partial bin for the upper index.
-                            eng_part_bins += (
-                                dNdlogE[:,upp_floor] * (upp - upp_floor)
-                                * self.eng[upp_floor]
-                                * log_bin_width[upp_floor]
-                            )
-
-                    eng_in_bin[i] = eng_full_bins + eng_part_bins
-
-                return eng_in_bin
+                # All of the totals are computed at once.
+                return _sum_between_bin_bounds(
+                    self.grid_vals * eng_weight, bound_arr
+                )
 
             if bound_type == 'eng':
                 bin_boundary = get_bin_bound(self.eng)
@@ -991,7 +1234,7 @@ class Spectra:
 
         else:
             return (
-                np.dot(dNdlogE, self.eng*log_bin_width)
+                np.dot(self.grid_vals, eng_weight)
                 + self.eng_underflow
             )
 
@@ -1017,7 +1260,9 @@ class Spectra:
             if weight.ndim == 1:
                 return np.dot(self.grid_vals, weight)
             elif weight.ndim == 2:
-                return np.sum(self.grid_vals*weight, axis=1)
+                # Row-wise dot products, without forming the 
+                # product array.
+                return np.einsum('ij,ij->i', self.grid_vals, weight)
             else:
                 raise TypeError('weight does not have the correct dimensions.')
         else:
@@ -1077,139 +1322,14 @@ class Spectra:
         spec.spectools.rebin_N_2D_arr
         """
 
-        if not np.all(np.diff(out_eng) > 0):
-            raise TypeError('new abscissa must be ordered in increasing energy.')
-
-        # Get the bin indices that the current abscissa (self.eng)
-        # corresponds to in the new abscissa (new_eng). Bin indices are
-        # with respect to bin centers.
-
-        # Add an additional bin at the lower end of out_eng so that
-        # underflow can be treated easily.
-
-        first_bin_eng = np.exp(
-            np.log(out_eng[0])
-            - (np.log(out_eng[1]) - np.log(out_eng[0]))
-        )
-        new_eng = np.insert(out_eng, 0, first_bin_eng)
-
-        # Find the relative bin indices for self.eng. The first bin in
-        # new_eng has bin index -1. Underflow has index -2, overflow
-        # corresponds to new_eng.size
-
-        bin_ind = np.interp(
-            self.eng, new_eng, np.arange(new_eng.size)-1,
-            left = -2, right = new_eng.size
-        )
-
-        # Locate where bin_ind is below 0, above self.length-1
-        # or in between.
-
-        ind_low  = np.where(bin_ind < 0)[0]
-        ind_high = np.where(bin_ind == new_eng.size)[0]
-        ind_reg  = np.where(
-            (bin_ind >= 0) & (bin_ind <= new_eng.size - 1)
-        )[0]
-
-        if ind_high.size > 0:
-            warnings.warn("The new abscissa lies below the old one: only bins that lie within the new abscissa will be rebinned, bins above the abscissa will be discarded.", RuntimeWarning)
-
-        # These arrays are of size in_eng x eng.
-        N_arr = self.totN('bin')
-        toteng_arr = self.toteng('bin')
-
-        N_arr_low  = N_arr[:,ind_low]
-        N_arr_high = N_arr[:,ind_high]
-        N_arr_reg  = N_arr[:,ind_reg]
-
-        toteng_arr_low = toteng_arr[:,ind_low]
-
-        # Factor depends on the spec_type.
-        if self.spec_type == 'dNdE':
-            # E dlog E of the new array.
-            fac = new_eng * get_log_bin_width(new_eng)
-        elif self.spec_type == 'N':
-            fac = np.ones_like(new_eng)
-
-
-        # Regular bins first.
-
-        # reg_bin_low is the array of the lower bins to be allocated the
-        # particles in N_arr_reg, similarly reg_bin_upp. This should also
-        # take care of the case where bin_ind is an integer.
-
-        reg_bin_low = np.floor(bin_ind[ind_reg]).astype(int)
-        reg_bin_upp = reg_bin_low + 1
-
-        # Takes care of the case where eng[-1] = new_eng[-1], which falls
-        # under regular indices. Remember the extra bin on the left.
-        reg_bin_low[reg_bin_low == new_eng.size-2] = new_eng.size - 3
-        reg_bin_upp[reg_bin_upp == new_eng.size-1] = new_eng.size - 2
-
-        # Split the particles up into the lower bin and upper bin.
-        # Remember there's an extra bin on the left when indexing into
-        # new_E_dlogE.
-        reg_data_low = (
-            (reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
-            / fac[reg_bin_low+1]
-        )
-        reg_data_upp = (
-            (bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
-            / fac[reg_bin_upp+1]
-        )
-
-        # Handle low bins.
-        low_bin_low = np.floor(bin_ind[ind_low]).astype(int)
-
-        N_above_underflow = np.sum(
-            (bin_ind[ind_low] - low_bin_low) * N_arr_low, axis = 1
-        )
-        eng_above_underflow = N_above_underflow * new_eng[1]
-
-        N_underflow = np.sum(N_arr_low, axis=1) - N_above_underflow
-        eng_underflow = (
-            np.sum(toteng_arr_low, axis=1) - eng_above_underflow
+        # All of the spectra are rebinned at once, and 
+        # rebin_N_2D_arr also checks that out_eng is increasing.
+        new_data, N_underflow, eng_underflow = rebin_N_2D_arr(
+            self.totN('bin'), self.eng, out_eng, spec_type=self.spec_type
         )
-        low_data = N_above_underflow/fac[1]
-
-        # Add up, obtain the new dN/dE.
-
-        new_data = np.zeros((self.in_eng.size, new_eng.size))
-        new_data[:,1] += low_data
-
-
-        # np.add.at(new_data, (slice(None), reg_bin_low+1), reg_data_low)
-        # np.add.at(new_data, (slice(None), reg_bin_upp+1), reg_data_upp)
-
-        # Replace with agg.aggregate
-        from darkhistory.numpy_groupies import aggregate as agg
-
-        # low_data = agg.aggregate(
-        #     reg_bin_low+1, reg_data_low, func='sum', fill_value=0, axis=1, size=new_eng.size
-        # )
-
-        # upp_data = agg.aggregate(
-        #     reg_bin_upp+1, reg_data_upp, func='sum', fill_value=0, axis=1, size=new_eng.size
-        # )
-        # new_data = (low_data + upp_data)
 
-        low_data = agg.aggregate(
-            reg_bin_low+1, np.transpose(reg_data_low), func='sum', 
-            fill_value=0, axis=0, size=new_eng.size
-        )
-
-        upp_data = agg.aggregate(
-            reg_bin_upp+1, np.transpose(reg_data_upp), func='sum', 
-            fill_value=0, axis=0, size=new_eng.size
-        )
-
-        new_data += np.transpose(low_data + upp_data)
-
-        # new_data[:,reg_bin_low+1] += reg_data_low
-        # new_data[:,reg_bin_upp+1] += reg_data_upp
-
-        self._eng = new_eng[1:]
-        self._grid_vals = new_data[:,1:]
+        self._eng = out_eng.astype(float)
+        self._grid_vals = new_data
         self._N_underflow += N_underflow
         self._eng_underflow += eng_underflow
 
@@ -1221,28 +1341,83 @@ class Spectra:
         spec : Spectrum
             The new spectrum to append.
         """
-        # Checks if spec_arr is empty
-        if self.eng.size != 0:
+        # Checks if spec_arr is empty. Spectrum objects usually share
+        # the abscissa of the Spectra, in which case comparing the
+        # values is unnecessary.
+        if self.eng.size != 0 and self.eng is not spec.eng:
             if not np.array_equal(self.eng, spec.eng):
                 raise TypeError("new Spectrum does not have the same energy abscissa.")
 
         if self.spec_type != spec.spec_type:
             raise TypeError("new Spectrum is not of the same type as the Spectra.")
 
-        self._in_eng = np.append(self.in_eng, spec.in_eng)
-        self._rs = np.append(self.rs, spec.rs)
-        self._N_underflow = np.append(self._N_underflow, spec.underflow['N'])
-        self._eng_underflow = np.append(
-            self._eng_underflow, spec.underflow['eng']
+        n = self._rs.size
+        arrs = (
+            self._in_eng, self._rs, self._N_underflow,
+            self._eng_underflow, self._grid_vals
+        )
+        new_vals = (
+            spec.in_eng, spec.rs, spec.underflow['N'],
+            spec.underflow['eng'], spec._data
         )
 
-        if self.eng.size == 0:
-            self._eng = spec.eng
-            self._grid_vals = np.atleast_2d(spec._data)
-        else:
-            self._grid_vals = np.concatenate(
-                (self.grid_vals, np.atleast_2d(spec._data))
+        if self.eng.size == 0 or any(arr.shape[0] != n for arr in arrs):
+            self._in_eng = np.append(self.in_eng, spec.in_eng)
+            self._rs = np.append(self.rs, spec.rs)
+            self._N_underflow = np.append(
+                self._N_underflow, spec.underflow['N']
             )
+            self._eng_underflow = np.append(
+                self._eng_underflow, spec.underflow['eng']
+            )
+            if self.eng.size == 0:
+                self._eng = spec.eng
+                self._grid_vals = np.atleast_2d(spec._data)
+            else:
+                self._grid_vals = np.concatenate(
+                    (self.grid_vals, np.atleast_2d(spec._data))
+                )
+            return
+
+        # The arrays are views of the leading rows of buffers with
+        # spare rows at the end, so that appending repeatedly copies
+        # each spectrum only a bounded number of times. The buffers
+        # are reused only if the arrays are still the views made by the
+        # last append to them, and can hold the new values.
+        # getattr, since instances created by unpickling do not go
+        # through __init__.
+        bufs, views, n_filled = getattr(
+            self, '_append_bufs', (None, None, None)
+        )
+        if not (
+            bufs is not None and n_filled[0] == n
+            and n < bufs[0].shape[0]
+            and all(
+                arr is view and view.base is buf
+                and np.result_type(buf, val) == buf.dtype
+                for arr, view, buf, val in zip(arrs, views, bufs, new_vals)
+            )
+        ):
+            bufs = tuple(
+                np.empty(
+                    (2*n + 1,) + arr.shape[1:],
+                    dtype=np.result_type(arr, val)
+                ) for arr, val in zip(arrs, new_vals)
+            )
+            for buf, arr in zip(bufs, arrs):
+                buf[:n] = arr
+            n_filled = [n]
+
+        for buf, val in zip(bufs, new_vals):
+            buf[n] = val
+        n_filled[0] = n + 1
+
+        views = tuple(buf[:n+1] for buf in bufs)
+        (
+            self._in_eng, self._rs, self._N_underflow,
+            self._eng_underflow, self._grid_vals
+        ) = views
+        self._append_bufs = (bufs, views, n_filled)
 
     def at_rs(
         self, new_rs, interp_type='val',
@@ -1267,8 +1442,10 @@ class Spectra:
         ):
             raise TypeError('redshift abscissa must be strictly increasing or decreasing for interpolation.')
 
+        log_rs = np.log(self.rs)
+
         interp_func = interpolate.interp1d(
-            np.log(self.rs), self.grid_vals, axis=0,
+            log_rs, self.grid_vals, axis=0,
             bounds_error=bounds_err, fill_value=fill_value
         )
 
@@ -1286,7 +1463,7 @@ class Spectra:
         elif interp_type == 'bin':
 
             log_new_rs = np.interp(
-                np.log(new_rs), np.arange(self.rs.size), np.log(self.rs)
+                np.log(new_rs), np.arange(self.rs.size), log_rs
             )
 
             return self.at_rs(np.exp(log_new_rs))
@@ -1333,17 +1510,13 @@ class Spectra:
                 )
 
             elif isinstance(ind, tuple):
-                spec_to_plot = np.stack(
-                    [
-                        self.grid_vals[i]*fac
-                        for i in np.arange(ind[0], ind[1], step)
-                    ], axis = -1
-                )
+                rows = np.arange(ind[0], ind[1], step)
+                spec_to_plot = np.transpose(self.grid_vals[rows]*fac)
                 return ax.plot(self.eng, spec_to_plot, **kwargs)
 
             elif isinstance(ind, np.ndarray) or isinstance(ind, list):
-                spec_to_plot = np.stack(
-                    [self.grid_vals[i]*fac for i in ind], axis=-1
+                spec_to_plot = np.transpose(
+                    self.grid_vals[np.asarray(ind)]*fac
                 )
                 return ax.plot(self.eng, spec_to_plot, **kwargs)
 
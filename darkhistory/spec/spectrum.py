@@ -5,6 +5,7 @@ from darkhistory import utilities as utils
 from darkhistory.spec.spectools import get_bin_bound
 from darkhistory.spec.spectools import get_log_bin_width
 from darkhistory.spec.spectools import rebin_N_arr
+from darkhistory.spec.spectools import _split_bin_ind
 import matplotlib.pyplot as plt
 import warnings
 
@@ -576,7 +577,7 @@ class Spectrum:
 
             if bound_type == 'bin':
 
-                if not all(np.diff(bound_arr) >= 0):
+                if not np.all(np.diff(bound_arr) >= 0):
                     raise TypeError("bound_arr must have increasing entries.")
 
                 N_in_bin = np.zeros(bound_arr.size-1)
@@ -584,47 +585,46 @@ class Spectrum:
                 if bound_arr[0] > length or bound_arr[-1] < 0:
                     return N_in_bin
 
-                for low,upp,i in zip(bound_arr[:-1], bound_arr[1:],
-                    np.arange(N_in_bin.size)):
-                    # Set the lower and upper bounds, including case where low and upp are outside of the bins.
-
-                    if low > length or upp < 0:
-                        N_in_bin[i] = 0
-                        continue
-
-                    low_ceil  = int(np.ceil(low))
-                    low_floor = int(np.floor(low))
-                    upp_ceil  = int(np.ceil(upp))
-                    upp_floor = int(np.floor(upp))
+                # Bounds outside of the bins include nothing beyond the bins, so they are clipped to [0, length]. The ceilings and floors of all of the bounds are then taken at once, outside of the loop.
+                clipped_bound_arr = np.clip(bound_arr, 0, length)
+                bound_ceil  = np.ceil(clipped_bound_arr).astype(int).tolist()
+                bound_floor = np.floor(clipped_bound_arr).astype(int).tolist()
+                clipped_bound_arr = clipped_bound_arr.tolist()
+
+                for i,(low,upp,low_ceil,low_floor,upp_ceil,upp_floor) in enumerate(zip(
+                    clipped_bound_arr[:-1], clipped_bound_arr[1:], 
+                    bound_ceil[:-1], bound_floor[:-1], 
+                    bound_ceil[1:], bound_floor[1:]
+                )):
                     # Sum the bins that are completely between the bounds.
-                    N_full_bins = np.dot(
+                    N_in_bin[i] = np.dot(
                         dNdlogE[low_ceil:upp_floor],
                         log_bin_width[low_ceil:upp_floor]
                     )
 
-                    N_part_bins = 0
+                    if low == low_ceil and upp == upp_floor:
+                        # Both bounds are on bin boundaries, so there are no partial bins.
+                        continue
 
                     if low_floor == upp_floor or low_ceil == upp_ceil:
                         # Bin indices are within the same bin. The second requirement covers the case where upp_ceil is length.
-                        N_part_bins += (
+                        N_in_bin[i] += (
                             dNdlogE[low_floor] * (upp - low)
                             * log_bin_width[low_floor]
                         )
                     else:
                         # Add up part of the bin for the low partial bin and the high partial bin.
-                        N_part_bins += (
+                        N_in_bin[i] += (
                             dNdlogE[low_floor] * (low_ceil - low)
                             * log_bin_width[low_floor]
                         )
                         if upp_floor < length:
                         # If upp_floor is length, then there is no partial bin for the upper index.
-                            N_part_bins += (
+                            N_in_bin[i] += (
                                 dNdlogE[upp_floor]
                                 * (upp-upp_floor) * log_bin_width[upp_floor]
                             )
 
-                    N_in_bin[i] = N_full_bins + N_part_bins
-
                 return N_in_bin
 
             if bound_type == 'eng':
@@ -699,7 +699,7 @@ class Spectrum:
 
             if bound_type == 'bin':
 
-                if not all(np.diff(bound_arr) >= 0):
+                if not np.all(np.diff(bound_arr) >= 0):
 
                     raise TypeError("bound_arr must have increasing entries.")
 
@@ -708,40 +708,40 @@ class Spectrum:
                 if bound_arr[0] > length or bound_arr[-1] < 0:
                     return eng_in_bin
 
-                for low,upp,i in zip(bound_arr[:-1], bound_arr[1:],
-                    np.arange(eng_in_bin.size)):
-
-                    if low > length or upp < 0:
-                        eng_in_bin[i] = 0
-                        continue
-
-                    low_ceil  = int(np.ceil(low))
-                    low_floor = int(np.floor(low))
-                    upp_ceil  = int(np.ceil(upp))
-                    upp_floor = int(np.floor(upp))
+                # Bounds outside of the bins include nothing beyond the bins, so they are clipped to [0, length]. The ceilings and floors of all of the bounds are then taken at once, outside of the loop.
+                clipped_bound_arr = np.clip(bound_arr, 0, length)
+                bound_ceil  = np.ceil(clipped_bound_arr).astype(int).tolist()
+                bound_floor = np.floor(clipped_bound_arr).astype(int).tolist()
+                clipped_bound_arr = clipped_bound_arr.tolist()
+
+                for i,(low,upp,low_ceil,low_floor,upp_ceil,upp_floor) in enumerate(zip(
+                    clipped_bound_arr[:-1], clipped_bound_arr[1:], 
+                    bound_ceil[:-1], bound_floor[:-1], 
+                    bound_ceil[1:], bound_floor[1:]
+                )):
                     # Sum the bins that are completely between the bounds.
-                    eng_full_bins = np.dot(eng[low_ceil:upp_floor]
+                    eng_in_bin[i] = np.dot(eng[low_ceil:upp_floor]
                         * dNdlogE[low_ceil:upp_floor],
                         log_bin_width[low_ceil:upp_floor])
 
-                    eng_part_bins = 0
+                    if low == low_ceil and upp == upp_floor:
+                        # Both bounds are on bin boundaries, so there are no partial bins.
+                        continue
 
                     if low_floor == upp_floor or low_ceil == upp_ceil:
                         # Bin indices are within the same bin. The second requirement covers the case where upp_ceil is length.
-                        eng_part_bins += (eng[low_floor] * dNdlogE[low_floor]
+                        eng_in_bin[i] += (eng[low_floor] * dNdlogE[low_floor]
                             * (upp - low) * log_bin_width[low_floor])
                     else:
                         # Add up part of the bin for the low partial bin and the high partial bin.
-                        eng_part_bins += (eng[low_floor] * dNdlogE[low_floor]
+                        eng_in_bin[i] += (eng[low_floor] * dNdlogE[low_floor]
                             * (low_ceil - low) * log_bin_width[low_floor])
                         if upp_floor < length:
                         # If upp_floor is length, then there is no partial bin for the upper index.
-                            eng_part_bins += (eng[upp_floor]
+                            eng_in_bin[i] += (eng[upp_floor]
                                 * dNdlogE[upp_floor] * (upp-upp_floor)
                                 * log_bin_width[upp_floor])
 
-                    eng_in_bin[i] = eng_full_bins + eng_part_bins
-
                 return eng_in_bin
 
             if bound_type == 'eng':
@@ -773,7 +773,7 @@ class Spectrum:
         """
         if new_eng.size != self.eng.size:
             raise TypeError("The new abscissa must have the same length as the old one.")
-        if not all(np.diff(new_eng) > 0):
+        if not np.all(np.diff(new_eng) > 0):
             raise TypeError("abscissa must be ordered in increasing energy.")
 
         new_log_bin_width = get_log_bin_width(new_eng)
@@ -853,27 +853,23 @@ class Spectrum:
         #     np.arange(new_eng.size)-1, left = -2, right = new_eng.size)
 
         # Locate where bin_ind is below 0, above self.length-1 and in between.
-        ind_low = np.where(bin_ind < 0)
-        ind_high = np.where(bin_ind == new_eng.size)
-        ind_reg = np.where( (bin_ind >= 0) & (bin_ind <= new_eng.size - 1) )
+        ind_low, ind_high, ind_reg = _split_bin_ind(bin_ind, new_eng.size)
 
-        if ind_high[0].size > 0:
+        if bin_ind[ind_high].size > 0:
             warnings.warn("The new abscissa lies below the old one: only bins that lie within the new abscissa will be rebinned, bins above the abscissa will be discarded.", RuntimeWarning)
             # raise OverflowError("the new abscissa lies below the old one: this function cannot handle overflow (yet?).")
 
-        # Get the total N and toteng in each bin of self._data
+        # Get the total N in each bin of self._data. The total energy is only needed in the bins below the new abscissa.
         if self._spec_type == 'dNdE':
             N_arr = self.totN('bin')
-            toteng_arr = self.toteng('bin')
         elif self._spec_type == 'N':
             N_arr = self.N
-            toteng_arr = self.N*self.eng
 
         N_arr_low = N_arr[ind_low]
         N_arr_high = N_arr[ind_high]
         N_arr_reg = N_arr[ind_reg]
 
-        toteng_arr_low = toteng_arr[ind_low]
+        toteng_arr_low = N_arr_low*self.eng[ind_low]
 
         # Bin width of the new array. Use only the log bin width, so that dN/dE = N/(E d log E)
         if self._spec_type == 'dNdE':
@@ -882,7 +878,8 @@ class Spectrum:
         # Regular bins first, done in a completely vectorized fashion.
 
         # reg_bin_low is the array of the lower bins to be allocated the particles in N_arr_reg, similarly reg_bin_upp. This should also take care of the fact that bin_ind is an integer.
-        reg_bin_low = np.floor(bin_ind[ind_reg]).astype(int)
+        bin_ind_reg = bin_ind[ind_reg]
+        reg_bin_low = np.floor(bin_ind_reg).astype(int)
         reg_bin_upp = reg_bin_low + 1
 
         # Takes care of the case where eng[-1] = new_eng[-1]
@@ -891,16 +888,16 @@ class Spectrum:
 
         if self._spec_type == 'dNdE':
             reg_dNdE_low = (
-                (reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
+                (reg_bin_upp - bin_ind_reg) * N_arr_reg
                 /new_E_dlogE[reg_bin_low+1]
             )
             reg_dNdE_upp = (
-                (bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
+                (bin_ind_reg - reg_bin_low) * N_arr_reg
                            /new_E_dlogE[reg_bin_upp+1]
             )
         elif self._spec_type == 'N':
-            reg_N_low = (reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
-            reg_N_upp = (bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
+            reg_N_low = (reg_bin_upp - bin_ind_reg) * N_arr_reg
+            reg_N_upp = (bin_ind_reg - reg_bin_low) * N_arr_reg
 
         # Low bins.
         low_bin_low = np.floor(bin_ind[ind_low]).astype(int)
@@ -913,22 +910,30 @@ class Spectrum:
         if self._spec_type == 'dNdE':
             low_dNdE = N_above_underflow/new_E_dlogE[1]
 
-        # Add up, obtain the new data.
-        new_data = np.zeros(new_eng.size)
+        # Add up, obtain the new data. np.bincount accumulates repeated bin indices.
         if self._spec_type == 'dNdE':
-            new_data[1] += low_dNdE
             # reg_dNdE_low = -1 refers to new_eng[0]
-            np.add.at(new_data, reg_bin_low+1, reg_dNdE_low)
-            np.add.at(new_data, reg_bin_upp+1, reg_dNdE_upp)
-            # print(new_data[reg_bin_low+1])
-            # new_data[reg_bin_low+1] += reg_dNdE_low
-            # new_data[reg_bin_upp+1] += reg_dNdE_upp
+            new_data = (
+                np.bincount(
+                    reg_bin_low+1, weights=reg_dNdE_low, 
+                    minlength=new_eng.size
+                )
+                + np.bincount(
+                    reg_bin_upp+1, weights=reg_dNdE_upp, 
+                    minlength=new_eng.size
+                )
+            )
+            new_data[1] += low_dNdE
         elif self._spec_type == 'N':
+            new_data = (
+                np.bincount(
+                    reg_bin_low+1, weights=reg_N_low, minlength=new_eng.size
+                )
+                + np.bincount(
+                    reg_bin_upp+1, weights=reg_N_upp, minlength=new_eng.size
+                )
+            )
             new_data[1] += N_above_underflow
-            np.add.at(new_data, reg_bin_low+1, reg_N_low)
-            np.add.at(new_data, reg_bin_upp+1, reg_N_upp)
-            # new_data[reg_bin_low+1] += reg_N_low
-            # new_data[reg_bin_upp+1] += reg_N_upp
 
         # Implement changes.
         self.eng = new_eng[1:]
@@ -972,8 +977,7 @@ class Spectrum:
         bin_ind = bin_ind_interp(self.eng)
 
         # Locate where bin_ind is in between.
-        ind_low = np.where(bin_ind < 0)
-        ind_reg = np.where( (bin_ind >= 0) & (bin_ind <= new_eng.size - 1) )
+        ind_low, _, ind_reg = _split_bin_ind(bin_ind, new_eng.size)
 
         N_arr = self.N
 
@@ -983,26 +987,32 @@ class Spectrum:
         # Regular bins first, done in a completely vectorized fashion.
 
         # reg_bin_low is the array of the lower bins to be allocated the particles in N_arr_reg, similarly reg_bin_upp. This should also take care of the fact that bin_ind is an integer.
-        reg_bin_low = np.floor(bin_ind[ind_reg]).astype(int)
+        bin_ind_reg = bin_ind[ind_reg]
+        reg_bin_low = np.floor(bin_ind_reg).astype(int)
         reg_bin_upp = reg_bin_low + 1
 
         # Takes care of the case where eng[-1] = new_eng[-1]
         reg_bin_low[reg_bin_low == new_eng.size-2] = new_eng.size - 3
         reg_bin_upp[reg_bin_upp == new_eng.size-1] = new_eng.size - 2
 
-        reg_N_low = (reg_bin_upp - bin_ind[ind_reg]) * N_arr_reg
-        reg_N_upp = (bin_ind[ind_reg] - reg_bin_low) * N_arr_reg
+        reg_N_low = (reg_bin_upp - bin_ind_reg) * N_arr_reg
+        reg_N_upp = (bin_ind_reg - reg_bin_low) * N_arr_reg
 
         # Low bins.
         low_bin_low = np.floor(bin_ind[ind_low]).astype(int)
         N_above_underflow = np.sum((bin_ind[ind_low] - low_bin_low)
             * N_arr_low)
 
-        # Add up, obtain the new data.
-        new_data = np.zeros(new_eng.size)
+        # Add up, obtain the new data. np.bincount accumulates repeated bin indices.
+        new_data = (
+            np.bincount(
+                reg_bin_low+1, weights=reg_N_low, minlength=new_eng.size
+            )
+            + np.bincount(
+                reg_bin_upp+1, weights=reg_N_upp, minlength=new_eng.size
+            )
+        )
         new_data[1] += N_above_underflow
-        np.add.at(new_data, reg_bin_low+1, reg_N_low)
-        np.add.at(new_data, reg_bin_upp+1, reg_N_upp)
 
         # Implement changes.
         self.eng = new_eng[1:]
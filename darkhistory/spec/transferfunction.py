@@ -118,8 +118,10 @@ class TransFuncAtEnergy(Spectra):
         # set zero values to some small value for log interp.
         non_zero_grid[np.abs(non_zero_grid) < 1e-100] = 1e-200
 
+        log_rs = np.log(self.rs)
+
         interp_func = interpolate.interp1d(
-            np.log(self.rs), np.log(non_zero_grid), axis=0,
+            log_rs, np.log(non_zero_grid), axis=0,
             bounds_error=bounds_error, fill_value=fill_value
         )
 
@@ -143,7 +145,7 @@ class TransFuncAtEnergy(Spectra):
             log_new_rs = np.interp(
                 np.log(new_rs),
                 np.arange(self.rs.size),
-                np.log(self.rs)
+                log_rs
             )
 
             return self.at_rs(np.exp(log_new_rs))
@@ -343,18 +345,21 @@ class TransFuncAtRedshift(Spectra):
                 N_und_grid   = non_zero_N_und
                 eng_und_grid = non_zero_eng_und
 
+            log_in_eng = np.log(self.in_eng)
+            log_new_eng = np.log(new_eng)
+
             interp_func = interpolate.interp1d(
-                np.log(self.in_eng), interp_grid, axis=0,
+                log_in_eng, interp_grid, axis=0,
                 bounds_error=bounds_error, fill_value=fill_value
             )
 
             interp_func_N_und = interpolate.interp1d(
-                np.log(self.in_eng), N_und_grid,
+                log_in_eng, N_und_grid,
                 bounds_error=bounds_error, fill_value=fill_value
             )
 
             interp_func_eng_und = interpolate.interp1d(
-                np.log(self.in_eng), eng_und_grid,
+                log_in_eng, eng_und_grid,
                 bounds_error=bounds_error, fill_value=fill_value
             )
 
@@ -364,16 +369,16 @@ class TransFuncAtRedshift(Spectra):
 
             if log_interp:
 
-                interp_vals = np.exp(interp_func(np.log(new_eng)))
-                interp_vals_N_und = np.exp(interp_func_N_und(np.log(new_eng)))
+                interp_vals = np.exp(interp_func(log_new_eng))
+                interp_vals_N_und = np.exp(interp_func_N_und(log_new_eng))
                 interp_vals_eng_und = np.exp(
-                    interp_func_eng_und(np.log(new_eng))
+                    interp_func_eng_und(log_new_eng)
                 )
 
             else:
-                interp_vals = interp_func(np.log(new_eng))
-                interp_vals_N_und = interp_func_N_und(np.log(new_eng))
-                interp_vals_eng_und = interp_func_eng_und(np.log(new_eng))
+                interp_vals = interp_func(log_new_eng)
+                interp_vals_N_und = interp_func_N_und(log_new_eng)
+                interp_vals_eng_und = interp_func_eng_und(log_new_eng)
 
             interp_vals[interp_vals < 1e-100] = 0
             interp_vals_N_und[interp_vals_N_und < 1e-100] = 0
@@ -439,27 +444,31 @@ class TransFuncAtRedshift(Spectra):
             bounds_error=bounds_error, fill_value=fill_value
         )
 
+        log_in_eng = np.log(self.in_eng)
+
         interp_func_N_und = interpolate.interp1d(
-            np.log(self.in_eng), np.log(non_zero_N_und),
+            log_in_eng, np.log(non_zero_N_und),
             bounds_error=bounds_error, fill_value=fill_value
         )
 
         interp_func_eng_und = interpolate.interp1d(
-            np.log(self.in_eng), np.log(non_zero_eng_und),
+            log_in_eng, np.log(non_zero_eng_und),
             bounds_error=bounds_error, fill_value=fill_value
         )
 
         if interp_type == 'val':
 
+            log_new_eng = np.log(new_eng)
+
             new_tf = TransFuncAtRedshift([])
 
             new_tf._spec_type = self.spec_type
-            interp_vals = np.exp(interp_func(np.log(new_eng)))
+            interp_vals = np.exp(interp_func(log_new_eng))
             interp_vals_N_und = np.exp(
-                interp_func_N_und(np.log(new_eng))
+                interp_func_N_und(log_new_eng)
             )
             interp_vals_eng_und = np.exp(
-                interp_func_eng_und(np.log(new_eng))
+                interp_func_eng_und(log_new_eng)
             )
             interp_vals[interp_vals < 1e-100] = 0
             interp_vals_N_und[interp_vals_N_und < 1e-100] = 0
@@ -539,20 +548,54 @@ class TransFuncAtRedshift(Spectra):
                 N_und_grid   = non_zero_N_und
                 eng_und_grid = non_zero_eng_und
 
-            interp_func = interpolate.interp2d(
-                np.log(self.eng), np.log(self.in_eng),
-                interp_grid,
-                bounds_error=bounds_error,
-                fill_value=np.log(fill_value)
+            # Bilinear interpolation over the grid, which is what
+            # interp2d does for a rectangular grid, evaluated on all of
+            # the new abscissae in a single call.
+            log_in_eng = np.log(self.in_eng)
+            log_eng = np.log(self.eng)
+            log_new_in_eng = np.atleast_1d(np.log(new_in_eng))
+            log_new_eng = np.atleast_1d(np.log(new_eng))
+
+            # RectBivariateSpline needs strictly increasing abscissae,
+            # while interp2d sorted them, so the grid is sorted here.
+            in_eng_order = np.argsort(log_in_eng)
+            eng_order = np.argsort(log_eng)
+            log_in_eng = log_in_eng[in_eng_order]
+            log_eng = log_eng[eng_order]
+
+            interp_func = interpolate.RectBivariateSpline(
+                log_in_eng, log_eng,
+                interp_grid[np.ix_(in_eng_order, eng_order)], kx=1, ky=1
             )
 
+            out_of_bounds = np.logical_or.outer(
+                (log_new_in_eng < log_in_eng[0])
+                | (log_new_in_eng > log_in_eng[-1]),
+                (log_new_eng < log_eng[0]) | (log_new_eng > log_eng[-1])
+            )
+            if bounds_error and np.any(out_of_bounds):
+                raise ValueError('values out of range of the abscissae.')
+
+            # For the same reason, the spline is evaluated on the sorted
+            # unique values of new_in_eng and new_eng, and
+            # the result is put back in the order of new_in_eng and
+            # new_eng.
+            uniq_in_eng, in_eng_ind = np.unique(
+                log_new_in_eng, return_inverse=True
+            )
+            uniq_eng, eng_ind = np.unique(log_new_eng, return_inverse=True)
+            interp_vals = interp_func(uniq_in_eng, uniq_eng)[
+                np.ix_(in_eng_ind, eng_ind)
+            ]
+            interp_vals[out_of_bounds] = np.log(fill_value)
+
             interp_func_N_und = interpolate.interp1d(
-                np.log(self.in_eng), N_und_grid,
+                log_in_eng, N_und_grid,
                 bounds_error=False, fill_value=0
             )
 
             interp_func_eng_und = interpolate.interp1d(
-                np.log(self.in_eng), eng_und_grid,
+                log_in_eng, eng_und_grid,
                 bounds_error=False, fill_value=0
             )
 
@@ -561,21 +604,17 @@ class TransFuncAtRedshift(Spectra):
             new_tf._spec_type = self.spec_type
 
             if log_interp:
-                new_tf._grid_vals = np.atleast_2d(
-                    np.exp(interp_func(np.log(new_eng), np.log(new_in_eng)))
-                )
+                new_tf._grid_vals = np.exp(interp_vals)
                 interp_vals_N_und = np.exp(
-                    interp_func_N_und(np.log(new_in_eng))
+                    interp_func_N_und(log_new_in_eng)
                 )
                 interp_vals_eng_und = np.exp(
-                    interp_func_eng_und(np.log(new_in_eng))
+                    interp_func_eng_und(log_new_in_eng)
                 )
             else:
-                new_tf._grid_vals   = np.atleast_2d(
-                    interp_func(np.log(new_eng), np.log(new_in_eng))
-                )
-                interp_vals_N_und   = interp_func_N_und(np.log(new_in_eng))
-                interp_vals_eng_und = interp_func_eng_und(np.log(new_in_eng))
+                new_tf._grid_vals   = interp_vals
+                interp_vals_N_und   = interp_func_N_und(log_new_in_eng)
+                interp_vals_eng_und = interp_func_eng_und(log_new_in_eng)
 
             # Re-zero small values.
             new_tf._grid_vals[new_tf.grid_vals < 1e-100] = 0
@@ -2,7 +2,10 @@
 
 """
 
+from functools import lru_cache
+
 import numpy as np
+import scipy.special as sp
 from scipy.interpolate import RegularGridInterpolator
 
 
@@ -21,13 +24,17 @@ def arrays_equal(ndarray_list):
 
     """
 
-    same = True
-    ind = 0
-    while same and ind < len(ndarray_list) - 1:
-        same = same & np.array_equal(ndarray_list[ind],
-            ndarray_list[ind+1])
-        ind += 1
-    return same
+    if len(ndarray_list) == 0:
+        return True
+
+    # Compare everything to the first array, stopping at the first 
+    # mismatch. Arrays are often shared, e.g. the abscissa of many 
+    # Spectrum objects, in which case no comparison is needed.
+    first = ndarray_list[0]
+    return all(
+        arr is first or np.array_equal(first, arr)
+        for arr in ndarray_list[1:]
+    )
 
 def is_log_spaced(arr):
     """Checks for a log-spaced array.
@@ -40,10 +47,11 @@ def is_log_spaced(arr):
     Returns
     -------
         bool
-            True if equal, False otherwise.
+            True if the ratio of consecutive entries is constant to a relative tolerance of 1e-12, False otherwise.
 
     """
-    return not bool(np.ptp(np.diff(np.log(arr))))
+    # The log bin widths of a log-spaced array computed in floating point are generally not exactly equal, so the ratios are compared with a tolerance instead.
+    return np.allclose(arr[1:], arr[:-1]*(arr[1]/arr[0]), rtol=1e-12, atol=0)
 
 def compare_arr(ndarray_list):
     """ Prints the arrays in a suitable format for comparison.
@@ -60,10 +68,84 @@ def compare_arr(ndarray_list):
 
     print(np.stack(ndarray_list, axis=-1))
 
+# Coefficients of x, x**2, ..., x**11 in the Taylor series of log(1+x) and 
+# Li2(x). These are computed in long double (float128 where available), and 
+# cast to the type of the input when used.
+_log_1_plus_x_coefs = (
+    (-1)**np.arange(11) / np.arange(1, 12, dtype=np.longdouble)
+)
+_spence_coefs = 1 / np.arange(1, 12, dtype=np.longdouble)**2
+
+# Coefficients of 1/x, 1/x**2, ... in the asymptotic series of e^x E_1(x)
+# and e^x E_2(x), for exp_expn.
+_exp_expn_1_coefs = np.array([1., -1., 2., -6., 24.])
+_exp_expn_2_coefs = np.array([1., -2., 6., -24., 120., -720.])
+
+# B_0, ..., B_22, for bernoulli.
+_bernoulli_small = np.array([1, -1/2, 1/6, 0, -1/30,
+    0, 1/42, 0, -1/30, 0, 5/66,
+    0, -691/2730, 0, 7/6, 0, -3617/510,
+    0, 43867/798, 0, -174611/330, 0, 854513/138
+])
+
+def _taylor_series(coefs, x):
+    """ Evaluates the series coefs[0]*x + coefs[1]*x**2 + ... in Horner form.
+
+    Parameters
+    ----------
+    coefs : ndarray
+        The coefficients of x, x**2 and so on.
+    x : ndarray
+        The input value.
+
+    Returns
+    -------
+    ndarray
+        The series evaluated at x.
+    """
+    coefs = coefs.astype(np.result_type(x, float))
+    expr = np.zeros_like(x, dtype=coefs.dtype)
+    for c in coefs[::-1]:
+        expr += c
+        expr *= x
+    return expr[()]
+
+def _taylor_series_diff(coefs, b, a):
+    """ Evaluates the difference of the series coefs[0]*x + coefs[1]*x**2 + ... between b and a in Horner form.
+
+    The difference is accumulated directly instead of subtracting the two series, so that there is no cancellation when b and a are close. 
+
+    Parameters
+    ----------
+    coefs : ndarray
+        The coefficients of x, x**2 and so on.
+    b : ndarray
+        The upper input value.
+    a : ndarray
+        The lower input value.
+
+    Returns
+    -------
+    ndarray
+        The series evaluated at b minus the series evaluated at a.
+    """
+    coefs = coefs.astype(np.result_type(b, a, float))
+    b_minus_a = np.subtract(b, a, dtype=coefs.dtype)
+    series_a = np.zeros_like(b_minus_a)
+    diff = np.zeros_like(b_minus_a)
+    # Each step of Horner's method takes series -> (series + c)*x, so 
+    # that the difference takes diff -> diff*b + (series_a + c)*(b - a).
+    for c in coefs[::-1]:
+        series_a += c
+        diff *= b
+        diff += series_a*b_minus_a
+        series_a *= a
+    return diff[()]
+
 def log_1_plus_x(x):
     """ Computes log(1+x) with greater floating point accuracy.
 
-    Unlike ``scipy.special.log1p``, this can take ``float128``. However the performance is certainly slower. See [1]_ for details. If that trick does not work, the code reverts to a Taylor expansion.
+    Unlike ``scipy.special.log1p``, this can take ``np.longdouble`` (``float128`` where available). However the performance is certainly slower. See [1]_ for details. If that trick does not work, the code reverts to a Taylor expansion. Inputs that are not ``np.longdouble`` are simply passed to ``np.log1p``, which is already accurate for small x.
 
     Parameters
     ----------
@@ -75,23 +157,21 @@ def log_1_plus_x(x):
     ndarray
         log(1+x).
     """
-    ind_not_zero = ((1+x) - 1 != 0)
-    expr = np.zeros_like(x)
+    if np.asarray(x).dtype != np.longdouble:
+        return np.log1p(x)
 
-    if np.any(ind_not_zero):
-        expr[ind_not_zero] = (
-            x[ind_not_zero]*np.log(1+x[ind_not_zero])
-            /((1+x[ind_not_zero]) - 1)
-        )
+    one_plus_x = 1 + x
+    one_plus_x_minus_one = one_plus_x - 1
+    ind_zero = (one_plus_x_minus_one == 0)
+
+    # Evaluate the trick over the whole array without masking, and then 
+    # replace the entries where 1+x rounds to 1 with the Taylor series.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expr = x*np.log(one_plus_x)/one_plus_x_minus_one
 
-    if np.any(~ind_not_zero):
-        expr[~ind_not_zero] = (
-            x[~ind_not_zero] - x[~ind_not_zero]**2/2
-            + x[~ind_not_zero]**3/3
-            - x[~ind_not_zero]**4/4 + x[~ind_not_zero]**5/5
-            - x[~ind_not_zero]**6/6 + x[~ind_not_zero]**7/7
-            - x[~ind_not_zero]**8/8 + x[~ind_not_zero]**9/9
-            - x[~ind_not_zero]**10/10 + x[~ind_not_zero]**11/11
+    if np.any(ind_zero):
+        expr[ind_zero] = _taylor_series(
+            _log_1_plus_x_coefs, x[ind_zero]
         )
     return expr
 
@@ -114,41 +194,34 @@ def bernoulli(k):
         The kth Bernoulli number.
     """
 
-    import scipy.special as sp
-
-    B_n = np.array([1, -1/2, 1/6, 0, -1/30,
-        0, 1/42, 0, -1/30, 0, 5/66,
-        0, -691/2730, 0, 7/6, 0, -3617/510,
-        0, 43867/798, 0, -174611/330, 0, 854513/138
-    ])
-
     if k <= 22:
-        return B_n[k]
+        return _bernoulli_small[k]
     else:
-        return sp.bernoulli(k)[-1]
+        return _bernoulli_large(k)
+
+@lru_cache(maxsize=None)
+def _bernoulli_large(k):
+    # sp.bernoulli computes all of B_0, ..., B_k.
+    return sp.bernoulli(k)[-1]
 
 def log_series_diff(b, a):
-    """ The Taylor series for log(1+b) - log(1+a).
+    """ The Taylor series for log(1-b) - log(1-a).
 
     Parameters
     ----------
     a : ndarray
-        Input for log(1+a).
+        Input for log(1-a).
     b : ndarray
-        Input for log(1+b).
+        Input for log(1-b).
 
     Returns
     -------
     ndarray
-        The Taylor series log(1+b) - log(1+a), up to the 11th order term.
+        The Taylor series log(1-b) - log(1-a), up to the 11th order term.
 
     """
-    return(
-        - (b-a) - (b**2 - a**2)/2 - (b**3 - a**3)/3
-        - (b**4 - a**4)/4 - (b**5 - a**5)/5 - (b**6 - a**6)/6
-        - (b**7 - a**7)/7 - (b**8 - a**8)/8 - (b**9 - a**9)/9
-        - (b**10 - a**10)/10 - (b**11 - a**11)/11
-    )
+    # The series for log(1-x) has coefficients -1/k.
+    return _taylor_series_diff(-np.abs(_log_1_plus_x_coefs), b, a)
 
 def spence_series_diff(b, a):
     """ Returns the Taylor series for Li\ :sub:`2`\ (b) - Li\ :sub:`2`\ (a).
@@ -172,13 +245,7 @@ def spence_series_diff(b, a):
 
     """
 
-    return(
-        (b - a) + (b**2 - a**2)/2**2 + (b**3 - a**3)/3**2
-        + (b**4 - a**4)/4**2 + (b**5 - a**5)/5**2
-        + (b**6 - a**6)/6**2 + (b**7 - a**7)/7**2
-        + (b**8 - a**8)/8**2 + (b**9 - a**9)/9**2
-        + (b**10 - a**10)/10**2 + (b**11 - a**11)/11**1
-    )
+    return _taylor_series_diff(_spence_coefs, b, a)
 
 def exp_expn(n, x):
     """ Returns :math:`e^x E_n(x)`.
@@ -203,8 +270,6 @@ def exp_expn(n, x):
         The value of :math:`e^x E_n(x)`. 
 
     """
-    import scipy.special as sp
-
     x_flt64 = np.array(x, dtype='float64')
 
     low = x < 700
@@ -216,15 +281,13 @@ def exp_expn(n, x):
     if np.any(high):
         if n == 1:
             # The relative error is roughly 1e-15 for 700, smaller for larger arguments.
-            expr[high] = (
-                1/x[high] - 1/x[high]**2 + 2/x[high]**3 - 6/x[high]**4
-                + 24/x[high]**5
+            expr[high] = _taylor_series(
+                _exp_expn_1_coefs, 1/x[high]
             )
         elif n == 2:
             # The relative error is roughly 6e-17 for 700, smaller for larger arguments.
-            expr[high] = (
-                1/x[high] - 2/x[high]**2 + 6/x[high]**3 - 24/x[high]**4
-                + 120/x[high]**5 - 720/x[high]**6
+            expr[high] = _taylor_series(
+                _exp_expn_2_coefs, 1/x[high]
             )
         else:
             raise TypeError('only supports n = 1 or 2 for x > 700.')
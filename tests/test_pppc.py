@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from pytest import approx
+
+import config
+from darkhistory.spec import pppc
+from darkhistory.spec.pppc import get_pppc_spec, get_pppc_spec_batch
+
+def _synthetic_pppc_data():
+
+    # Smooth tables on the same layout as the PPPC4DMID data, with a
+    # different grid and shape for each channel.
+    coords_data = np.empty((2, 23, 2), dtype=object)
+    values_data = np.empty((2, 23), dtype=object)
+    for i in np.arange(2):
+        for j in np.arange(23):
+            mDM_in_GeV = np.logspace(np.log10(5 + j), 5, 40 + j % 3)
+            log10x = np.linspace(-8.9, 0, 150 + 3*(j % 5))
+            M, L = np.meshgrid(np.log10(mDM_in_GeV), log10x, indexing='ij')
+            coords_data[i, j, 0] = mDM_in_GeV
+            coords_data[i, j, 1] = log10x
+            values_data[i, j] = (
+                -0.3*(L + 3 + 0.1*j)**2 + 0.2*M
+                + 0.05*np.sin(3*L*M) + 0.1*i
+            )
+
+    chan_list = [
+        'e', 'mu', 'tau', 'q', 'c', 'b', 't', 'W', 'Z', 'g', 'gamma', 'h',
+        'nu_e', 'nu_mu', 'nu_tau', 'VV_to_4e', 'VV_to_4mu', 'VV_to_4tau'
+    ]
+    mDM_coeffs_cache = {}
+    return {
+        sec: {
+            pri: config.PchipInterpolator2D(
+                coords_data, values_data, pri, sec, mDM_coeffs_cache
+            ) for pri in chan_list
+        } for sec in ['elec', 'phot']
+    }
+
+def test_get_pppc_spec_batch(monkeypatch):
+
+    data = _synthetic_pppc_data()
+    monkeypatch.setattr(pppc, 'load_data', lambda data_type: data)
+
+    pri_list = [
+        'e', 'mu', 'tau', 'q', 'b', 'W', 'Z', 'g', 'gamma', 'h',
+        'nu_e', 'VV_to_4tau', 'elec_delta', 'phot_delta'
+    ]
+    eng = np.logspace(3, 13.5, 200)
+    # The last abscissa lies entirely below the tables.
+    cases = [(3e11, eng), (1e13, eng), (1e13, np.logspace(-5, 2, 50))]
+
+    for sec in ['elec', 'phot']:
+        for decay in [False, True]:
+            for mDM, eng in cases:
+                batch = get_pppc_spec_batch(
+                    mDM, eng, pri_list, sec, decay=decay
+                )
+                assert len(batch) == len(pri_list)
+                for pri, spec in zip(pri_list, batch):
+                    expected = get_pppc_spec(
+                        mDM, eng, pri, sec, decay=decay
+                    )
+                    assert spec.spec_type == expected.spec_type
+                    assert np.array_equal(spec.eng, expected.eng)
+                    assert spec.dNdE == approx(
+                        expected.dNdE, rel=1e-12, abs=0
+                    )
+
+def test_get_pppc_spec_decreasing_eng(monkeypatch):
+
+    data = _synthetic_pppc_data()
+    monkeypatch.setattr(pppc, 'load_data', lambda data_type: data)
+
+    eng = np.logspace(13.5, 3, 200)
+    with pytest.raises(ValueError):
+        get_pppc_spec(1e13, eng, 'b', 'elec')
+    with pytest.raises(ValueError):
+        get_pppc_spec_batch(1e13, eng, ['b'], 'elec')
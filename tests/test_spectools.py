@@ -0,0 +1,59 @@
+import warnings
+
+import numpy as np
+
+from pytest import approx
+
+from darkhistory.spec.spectrum import Spectrum
+from darkhistory.spec.spectools import rebin_N_2D_arr
+
+def _rebin_each_row(N_arr, in_eng, out_eng, spec_type):
+
+    data, N_underflow, eng_underflow = [], [], []
+    for N, eng in zip(N_arr, in_eng):
+        spec = Spectrum(eng, N, spec_type='N')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            spec.rebin(out_eng)
+        if spec_type == 'dNdE':
+            data.append(spec.dNdE)
+        else:
+            data.append(spec.N)
+        N_underflow.append(spec.underflow['N'])
+        eng_underflow.append(spec.underflow['eng'])
+
+    return np.array(data), np.array(N_underflow), np.array(eng_underflow)
+
+def test_rebin_N_2D_arr():
+
+    rng = np.random.default_rng(0)
+    N_arr = rng.uniform(size=(6, 40))
+    eng = np.logspace(-1, 3, 40)
+    # The new abscissa starts above eng[0], so that some particles go
+    # to the underflow, and ends below eng[-1], so that the highest bins
+    # are discarded.
+    out_eng = np.logspace(0.3, 2.5, 25)
+
+    for spec_type in ['N', 'dNdE']:
+
+        # Shared abscissa.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            result = rebin_N_2D_arr(N_arr, eng, out_eng, spec_type=spec_type)
+        expected = _rebin_each_row(
+            N_arr, [eng]*N_arr.shape[0], out_eng, spec_type
+        )
+        assert expected[1].sum() > 0
+        for res, exp in zip(result, expected):
+            assert res == approx(exp, rel=1e-12, abs=1e-300)
+
+        # A different abscissa for each spectrum.
+        in_eng = np.outer(np.linspace(0.5, 2, N_arr.shape[0]), eng)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            result = rebin_N_2D_arr(
+                N_arr, in_eng, out_eng, spec_type=spec_type
+            )
+        expected = _rebin_each_row(N_arr, in_eng, out_eng, spec_type)
+        for res, exp in zip(result, expected):
+            assert res == approx(exp, rel=1e-12, abs=1e-300)
@@ -0,0 +1,109 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from darkhistory.spec.spectrum import Spectrum
+from darkhistory.spec.spectra import Spectra
+
+def test_inplace_ops_copy_grid_vals():
+
+    eng = np.array([3, 10, 29, 3000])
+    rs = np.array([3., 2., 1.])
+
+    grid_vals = np.ones((3, 4))
+    spectra = Spectra(grid_vals, eng=eng, rs=rs)
+    spectra += np.ones(4)
+    assert np.all(grid_vals == 1)
+    assert np.all(spectra.grid_vals == 2)
+
+    int_grid_vals = np.ones((3, 4), dtype=int)
+    spectra = Spectra(int_grid_vals, eng=eng, rs=rs)
+    spectra /= 2
+    spectra *= 1.5
+    assert np.all(int_grid_vals == 1)
+    assert np.all(spectra.grid_vals == 0.75)
+
+def test_slice_is_independent():
+
+    eng = np.array([3, 10, 29, 3000])
+    spectra = Spectra(
+        np.ones((3, 4)), eng=eng, in_eng=np.array([5., 6., 7.]),
+        rs=np.array([3., 2., 1.])
+    )
+
+    spectra_slice = spectra[0:2]
+    spectra_slice *= 5
+    spectra_slice[1] = spectra[2]
+    assert np.all(spectra_slice.grid_vals == np.array([[5.]*4, [1.]*4]))
+    assert np.array_equal(spectra_slice.in_eng, [5., 7.])
+
+    assert np.all(spectra.grid_vals == 1)
+    assert np.array_equal(spectra.in_eng, [5., 6., 7.])
+    assert np.array_equal(spectra.rs, [3., 2., 1.])
+
+def _spec_list(eng, n):
+
+    spec_list = []
+    for i in np.arange(n):
+        spec = Spectrum(
+            eng, np.arange(eng.size) + 10.*i, in_eng=1. + i, rs=100. - i,
+            spec_type='N'
+        )
+        spec.underflow['N'] = 0.5*i
+        spec.underflow['eng'] = 2.*i
+        spec_list.append(spec)
+    return spec_list
+
+def _assert_same_spectra(spectra, expected):
+
+    assert spectra.spec_type == expected.spec_type
+    assert np.array_equal(spectra.eng, expected.eng)
+    assert np.array_equal(spectra.grid_vals, expected.grid_vals)
+    assert np.array_equal(spectra.in_eng, expected.in_eng)
+    assert np.array_equal(spectra.rs, expected.rs)
+    assert np.array_equal(spectra.N_underflow, expected.N_underflow)
+    assert np.array_equal(spectra.eng_underflow, expected.eng_underflow)
+
+def test_append():
+
+    eng = np.array([3, 10, 29, 3000])
+    spec_list = _spec_list(eng, 40)
+
+    # Enough spectra for the spare rows to be reallocated several times.
+    spectra = Spectra(spec_list[:1])
+    for spec in spec_list[1:20]:
+        spectra.append(spec)
+    _assert_same_spectra(spectra, Spectra(spec_list[:20]))
+
+    # A pickled Spectra does not keep the spare rows, but can still be
+    # appended to.
+    spectra = pickle.loads(pickle.dumps(spectra))
+    _assert_same_spectra(spectra, Spectra(spec_list[:20]))
+    for spec in spec_list[20:]:
+        spectra.append(spec)
+    _assert_same_spectra(spectra, Spectra(spec_list))
+
+def test_setitem_slice():
+
+    eng = np.array([3, 10, 29, 3000])
+    spec_list = _spec_list(eng, 5)
+    new_specs = _spec_list(eng, 8)[5:]
+
+    spectra = Spectra(spec_list)
+    spectra[1:4] = new_specs
+    _assert_same_spectra(
+        spectra, Spectra([spec_list[0]] + new_specs + [spec_list[4]])
+    )
+
+    spectra = Spectra(spec_list)
+    spectra[::2] = new_specs
+    _assert_same_spectra(
+        spectra, Spectra([
+            new_specs[0], spec_list[1], new_specs[1],
+            spec_list[3], new_specs[2]
+        ])
+    )
+
+    with pytest.raises(TypeError):
+        spectra[0:3] = _spec_list(eng*2, 3)
@@ -0,0 +1,46 @@
+import numpy as np
+
+from pytest import approx
+
+from darkhistory.spec.transferfunction import TransFuncAtRedshift
+
+def test_at_val_unsorted():
+
+    in_eng = np.logspace(0, 4, 20)
+    eng = np.logspace(-2, 5, 30)
+    grid_vals = np.outer(np.linspace(1, 2, 20), np.linspace(3, 1, 30))
+    tf = TransFuncAtRedshift(
+        grid_vals, eng=eng, in_eng=in_eng, rs=np.ones(20)
+    )
+
+    new_in_eng = np.array([500., 50., 200., 50.])
+    new_eng = np.array([300., 3., 30.])
+    in_eng_order = np.argsort(new_in_eng)
+    eng_order = np.argsort(new_eng)
+
+    unsorted_tf = tf.at_val(new_in_eng, new_eng)
+    sorted_tf = tf.at_val(new_in_eng[in_eng_order], new_eng[eng_order])
+
+    assert np.array_equal(unsorted_tf.in_eng, new_in_eng)
+    assert unsorted_tf.grid_vals[np.ix_(in_eng_order, eng_order)] == approx(
+        sorted_tf.grid_vals
+    )
+
+def test_at_val_decreasing_in_eng():
+
+    in_eng = np.logspace(0, 4, 20)
+    eng = np.logspace(-2, 5, 30)
+    grid_vals = np.outer(np.linspace(1, 2, 20), np.linspace(3, 1, 30))
+    tf = TransFuncAtRedshift(
+        grid_vals, eng=eng, in_eng=in_eng, rs=np.ones(20)
+    )
+    reversed_tf = TransFuncAtRedshift(
+        grid_vals[::-1], eng=eng, in_eng=in_eng[::-1], rs=np.ones(20)
+    )
+
+    new_in_eng = np.array([50., 200., 500.])
+    new_eng = np.array([3., 30., 300.])
+
+    assert reversed_tf.at_val(new_in_eng, new_eng).grid_vals == approx(
+        tf.at_val(new_in_eng, new_eng).grid_vals
+    )
@@ -0,0 +1,26 @@
+import numpy as np
+import scipy.special as sp
+
+from pytest import approx
+
+from darkhistory.utilities import spence_series_diff
+
+def test_spence_series_diff():
+
+    # BE_integrals uses the series for Li2(exp(-b)) - Li2(exp(-a)) with
+    # a, b > 2, so the largest inputs are close to exp(-2). There, the
+    # truncation error of the series is about 3e-13. 
+    a = np.array([2., 2., 2.5, 3., 2.])
+    b = np.array([2.5, 4., 2.5 + 1e-6, 30., np.inf])
+
+    # scipy.special.spence(z) is Li2(1 - z). 
+    expected = sp.spence(1 - np.exp(-b)) - sp.spence(1 - np.exp(-a))
+
+    for dtype in [np.float64, np.longdouble]:
+        result = spence_series_diff(
+            np.exp(-b.astype(dtype)), np.exp(-a.astype(dtype))
+        )
+        assert result.dtype == dtype
+        assert np.array(result, dtype=float) == approx(
+            expected, rel=0, abs=1e-12
+        )